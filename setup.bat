@@ -1,10 +1,10 @@
 @echo off
 echo Setting up virtual environment...
 
-:: Check if Python is installed and version is 3.8 or higher
+:: Check if Python is installed and version is 3.10 or higher
 python --version >nul 2>&1
 if %ERRORLEVEL% neq 0 (
-    echo Python is not installed. Please install Python 3.8 or higher.
+    echo Python is not installed. Please install Python 3.10 or higher.
     pause
     exit /b 1
 )
@@ -14,12 +14,12 @@ for /f "tokens=1,2 delims=." %%a in ("%PY_VERSION%") do (
     set MINOR=%%b
 )
 if %MAJOR% lss 3 (
-    echo Python 3.8 or higher is required. Found version %PY_VERSION%.
+    echo Python 3.10 or higher is required. Found version %PY_VERSION%.
     pause
     exit /b 1
 )
-if %MAJOR% equ 3 if %MINOR% lss 8 (
-    echo Python 3.8 or higher is required. Found version %PY_VERSION%.
+if %MAJOR% equ 3 if %MINOR% lss 10 (
+    echo Python 3.10 or higher is required. Found version %PY_VERSION%.
     pause
     exit /b 1
 )
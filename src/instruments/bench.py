@@ -6,57 +6,145 @@ Vector Signal Generator (VSG) instruments.
 
 from src.instruments.iSocket import iSocket
 import configparser
+import functools
+import logging
 import os
+import socket
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCPI_PORT = 5025  # Raw-socket SCPI port; avoids the VXI-11 RPC layer entirely
+IO_TIMEOUT = 30  # Seconds; applied once when a pooled connection is opened
+
+# Open instrument connections keyed by (ip, port), shared by all bench instances
+_pool = {}
+_pool_lock = threading.Lock()  # Guards _pool; setup threads may start instruments concurrently
+
+
+@functools.lru_cache(maxsize=None)
+def _load_config():
+    """Read bench_config.ini once and return (VSA_IP, VSG_IP)."""
+    config = configparser.ConfigParser()
+    # Construct the path to bench_config.ini relative to this script's location
+    config_file = os.path.join(os.path.dirname(__file__), 'bench_config.ini')
+    if not config.read(config_file):
+        raise FileNotFoundError(f"Configuration file '{config_file}' not found.")
+    if 'Settings' not in config:
+        raise ValueError(f"Configuration file '{config_file}' is missing the 'Settings' section.")
+    return config['Settings']['VSA_IP'], config['Settings']['VSG_IP']
 
 
 class bench:
     """Class to manage VSA and VSG instrument connections and settings."""
 
     def __init__(self):
-        config = configparser.ConfigParser()
-        # Construct the path to bench_config.ini relative to this script's location
-        config_file = os.path.join(os.path.dirname(__file__), 'bench_config.ini')
-        if not config.read(config_file):
-            raise FileNotFoundError(f"Configuration file '{config_file}' not found.")
-        if 'Settings' not in config:
-            raise ValueError(f"Configuration file '{config_file}' is missing the 'Settings' section.")
-        self.VSA_IP = config['Settings']['VSA_IP']  # Load VSA IP
-        self.VSG_IP = config['Settings']['VSG_IP']  # Load VSG IP
+        self.VSA_IP, self.VSG_IP = _load_config()  # Load VSA/VSG IPs
         self.VSA = None
         self.VSG = None
 
     def bench_verify(self):
-        """Verify connectivity to VSA and VSG by querying their IDs."""
+        """Verify connectivity to VSA and VSG by querying their IDs.
+
+        The connections stay open on self.VSA/self.VSG (and in the shared pool)
+        for set_VSx_freq() and set_inst_off().
+        """
         try:
-            self.VSA = iSocket().open(self.VSA_IP, 5025)
-            self.VSG = iSocket().open(self.VSG_IP, 5025)
-            print(f"\nVSA ID: {self.VSA.idn}")
-            print(f"VSG ID: {self.VSG.idn}")
+            self.VSA_start()
+            self.VSG_start()
+            logger.info("VSA ID: %s", self.VSA.idn)
+            logger.info("VSG ID: %s", self.VSG.idn)
         except Exception as e:
-            print(f"Error connecting to instruments: {e}")
+            logger.error("Error connecting to instruments: %s", e)
             raise
 
-    def VSA_start(self):
-        """Establish connection to VSA and return the socket object."""
+    @staticmethod
+    def _is_alive(inst):
+        """Return True if the instrument connection is open and clean.
+
+        A connection is not reusable once the instrument has closed it, or
+        while reply bytes are still unread (buffered in the iSocket or pending
+        on the socket): the next query would read a stale reply. A
+        non-blocking MSG_PEEK read returns b'' or data in those cases, and
+        raises BlockingIOError only while the connection is open and idle.
+        """
+        sock = inst.sock
+        if sock is None or sock.fileno() == -1 or inst._rbuf:
+            return False
+        previous_timeout = sock.gettimeout()
+        sock.setblocking(False)
         try:
-            self.VSA = iSocket().open(self.VSA_IP, 5025)
+            sock.recv(1, socket.MSG_PEEK)
+            return False  # Closed by the instrument, or an unread reply is pending
+        except BlockingIOError:
+            return True  # Open with nothing pending
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(previous_timeout)
+
+    def _connect(self, ip, port=SCPI_PORT):
+        """Return a pooled connection to ip:port, opening a new one only if needed.
+
+        The liveness check and any replacement happen under _pool_lock, so
+        every caller, including a repeat VSA_start()/VSG_start(), gets the one
+        current connection for ip:port.
+        """
+        with _pool_lock:
+            inst = _pool.get((ip, port))
+            if inst is None or not self._is_alive(inst):
+                if inst is not None:
+                    inst.close()  # Release the dead or dirty socket before replacing it
+                inst = iSocket().open(ip, port)
+                inst.set_timeout(IO_TIMEOUT)
+                _pool[(ip, port)] = inst
+            return inst
+
+    @staticmethod
+    def _evict(ip, port=SCPI_PORT):
+        """Close and forget the pooled connection to ip:port, if any."""
+        with _pool_lock:
+            inst = _pool.pop((ip, port), None)
+        if inst is not None:
+            inst.close()
+
+    def VSA_start(self, port=SCPI_PORT):
+        """Establish connection to VSA and return the socket object.
+
+        Args:
+            port (int, optional): Raw-socket SCPI port, default 5025.
+        """
+        try:
+            self.VSA = self._connect(self.VSA_IP, port)
             return self.VSA
         except Exception as e:
-            print(f"Error starting VSA: {e}")
+            logger.error("Error starting VSA: %s", e)
             raise
 
     def VSG_network_reset(self):
-        """Reset VSG network settings and wait for completion."""
+        """Reset VSG network settings and wait for completion.
+
+        The reset drops the VSG's network link, so its pooled connection is
+        evicted; the next VSG_start() opens a fresh one.
+        """
         self.VSG_start()
-        self.VSG.query('SYST:COMM:NETW:REST;*OPC?')
+        try:
+            self.VSG.query('SYST:COMM:NETW:REST;*OPC?')
+        finally:
+            self._evict(self.VSG_IP)
+            self.VSG = None
 
-    def VSG_start(self):
-        """Establish connection to VSG and return the socket object."""
+    def VSG_start(self, port=SCPI_PORT):
+        """Establish connection to VSG and return the socket object.
+
+        Args:
+            port (int, optional): Raw-socket SCPI port, default 5025.
+        """
         try:
-            self.VSG = iSocket().open(self.VSG_IP, 5025)
+            self.VSG = self._connect(self.VSG_IP, port)
             return self.VSG
         except Exception as e:
-            print(f"Error starting VSG: {e}")
+            logger.error("Error starting VSG: %s", e)
             raise
 
     def set_VSx_freq(self, freq):
@@ -65,13 +153,21 @@ class bench:
         Args:
             freq (float): Frequency in Hz.
         """
-        self.VSA.write(f':SENS:FREQ:CENT {freq}')
-        self.VSG.write(f':SOUR1:FREQ:CW {freq}')
+        self.VSA.write_sync_many([f':SENS:FREQ:CENT {freq}'])
+        self.VSG.write_sync_many([f':SOUR1:FREQ:CW {freq}'])
+
+    def close_all(self):
+        """Close every pooled instrument connection, e.g. at the end of a run."""
+        with _pool_lock:
+            connections = list(_pool.values())
+            _pool.clear()
+        for inst in connections:
+            inst.close()
+        self.VSA = None
+        self.VSG = None
 
     def set_inst_off(self):
-        self.VSA.write(':SYST:SHUT')
-        self.VSG.write(':SYST:SHUT')
-        if hasattr(self.VSA, 'sock') and self.VSA.sock:
-            self.VSA.sock.close()
-        if hasattr(self.VSG, 'sock') and self.VSG.sock:
-            self.VSG.sock.close()
+        """Shut down both instruments and close their connections."""
+        for inst in (self.VSA, self.VSG):
+            inst.write(':SYST:SHUT')
+            inst.close()
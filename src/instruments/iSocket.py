@@ -6,55 +6,122 @@ Provides socket-based communication with VSA and VSG instruments.
 import socket
 import os
 import logging
+import logging.handlers
+
+RECV_CHUNK_SIZE = 65536
+SOCKET_BUFFER_SIZE = 65536  # Kernel send/receive buffer, sized for long FPE:X?/Y? responses
+
+# Applied to every connection before connect(): TCP_NODELAY removes the
+# Nagle/delayed-ACK stall on small SCPI request/response exchanges,
+# SO_KEEPALIVE lets long-idle sessions detect half-open connections and the
+# buffer sizes let large trace/peak-list responses arrive without stalling.
+DEFAULT_SOCKET_OPTIONS = (
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    (socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE),
+    (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE),
+)
+
+CONNECT_TIMEOUT = 5.0  # Seconds allowed for the TCP connect
+LOG_BUFFER_RECORDS = 200  # Records held in memory before flushing to iSocket.log
+
+logger = logging.getLogger(__name__)
+_CONFIGURED = False
+
+
+def _configure_logging():
+    """Set up logging to logs/iSocket.log once per process."""
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+    log_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(os.path.join(log_dir, 'iSocket.log'))
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    # Buffer records and write them in batches; errors flush immediately
+    buffered_handler = logging.handlers.MemoryHandler(
+        LOG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler)
+    logging.basicConfig(level=logging.WARNING, handlers=[buffered_handler])
+    _CONFIGURED = True
+
+
+def _encode(cmd):
+    """Return the newline-terminated UTF-8 bytes for a SCPI command."""
+    return cmd.encode('utf-8') + b'\n'
 
 
 class iSocket:
     """Class for socket communication with RF instruments."""
 
     def __init__(self):
-        """Initialize socket and logging."""
-        # Setup logging to logs/iSocket.log
-        log_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, 'iSocket.log')
-        logging.basicConfig(
-            filename=log_path,
-            level=logging.INFO,
-            format='%(asctime)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        """Initialize logging; the socket itself is created by open()."""
+        _configure_logging()
+        self.sock = None
         self.idn = "Unknown"  # Placeholder for instrument ID
+        self._rbuf = bytearray()  # Received bytes not yet consumed
+        self._chunk = memoryview(bytearray(RECV_CHUNK_SIZE))  # Reused recv_into target
 
-    def open(self, ip, port):
+    def open(self, ip, port, socket_options=DEFAULT_SOCKET_OPTIONS):
         """Connect to instrument at specified IP and port.
 
         Args:
             ip (str): Instrument IP address.
             port (int): Port number (e.g., 5025 for SCPI).
+            socket_options (iterable, optional): (level, option, value) tuples
+                passed to setsockopt before connecting.
 
         Returns:
             iSocket: Self for method chaining.
         """
+        if self.sock:
+            self.sock.close()
+        self._rbuf.clear()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
+            for level, option, value in socket_options:
+                self.sock.setsockopt(level, option, value)
+            self.sock.settimeout(CONNECT_TIMEOUT)
             self.sock.connect((ip, port))
-            self.logger.info(f"Connected to {ip}:{port}")
+            self.sock.settimeout(None)  # Callers set their own I/O timeout via set_timeout()
+            logger.info("Connected to %s:%s", ip, port)
             # Query instrument ID (example)
             self.idn = self.query('*IDN?').strip()
             return self
         except Exception as e:
-            self.logger.error(f"Connection failed to {ip}:{port}: {e}")
+            logger.error("Connection failed to %s:%s: %s", ip, port, e)
+            self.close()
             raise
 
     def close(self):
-        """Close the socket connection."""
+        """Close the socket connection.
+
+        Unread bytes are discarded and sock is set to None, so a closed
+        connection is never mistaken for a usable one.
+        """
+        if not self.sock:
+            return
+        sock, self.sock = self.sock, None
+        self._rbuf.clear()
         try:
-            self.sock.close()
-            self.logger.info("Socket closed")
+            sock.close()
+            logger.info("Socket closed")
         except Exception as e:
-            self.logger.error(f"Failed to close socket: {e}")
+            logger.error("Failed to close socket: %s", e)
             raise
 
+    def set_timeout(self, seconds):
+        """Set the socket I/O timeout.
+
+        Args:
+            seconds (float or None): Timeout in seconds; None blocks indefinitely.
+
+        Returns:
+            float or None: The previous timeout, so callers can restore it.
+        """
+        previous_timeout = self.sock.gettimeout()
+        self.sock.settimeout(seconds)
+        return previous_timeout
+
     def query(self, cmd):
         """Send SCPI command and return response.
 
@@ -65,15 +132,75 @@ class iSocket:
             str: Instrument response.
         """
         try:
-            self.logger.info(f"Query: {cmd}")
-            self.sock.send(f"{cmd}\n".encode())
-            response = self.sock.recv(1024).decode().strip()
-            self.logger.info(f"Response: {response}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Q %s", cmd)
+            self.sock.sendall(_encode(cmd))
+            response = self._readline().decode().strip()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("R %s", response)
             return response
         except Exception as e:
-            self.logger.error(f"Query failed: {cmd}, Error: {e}")
+            logger.error("Query failed: %s, Error: %s", cmd, e)
+            self.close()  # A late or partial reply would desync the next query
             raise
 
+    def queryBinary(self, cmd):
+        """Send SCPI command and return an IEEE 488.2 definite-length block.
+
+        Args:
+            cmd (str): SCPI command to send.
+
+        Returns:
+            bytes: Block payload without the #<n><len> header.
+        """
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Q %s", cmd)
+            self.sock.sendall(_encode(cmd))
+            header = self._read_exact(2)
+            if header[:1] != b'#':
+                raise ValueError(f"Expected binary block, got {bytes(header)!r}")
+            num_digits = int(header[1:2])
+            if num_digits == 0:  # Indefinite-length block, terminated by newline
+                return self._readline()
+            length = int(self._read_exact(num_digits))
+            payload = self._read_exact(length)
+            self._readline()  # Consume trailing terminator
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("R <%d bytes>", length)
+            return payload
+        except Exception as e:
+            logger.error("Query failed: %s, Error: %s", cmd, e)
+            self.close()  # A late or partial reply would desync the next query
+            raise
+
+    def _fill(self):
+        """Receive the next chunk from the socket into the read buffer."""
+        n = self.sock.recv_into(self._chunk)
+        if n == 0:
+            raise ConnectionError("Connection closed by instrument")
+        self._rbuf += self._chunk[:n]
+
+    def _readline(self):
+        """Return the next newline-terminated message without its terminator."""
+        start = 0
+        while True:
+            idx = self._rbuf.find(b'\n', start)
+            if idx >= 0:
+                line = bytes(self._rbuf[:idx])
+                del self._rbuf[:idx + 1]
+                return line
+            start = len(self._rbuf)
+            self._fill()
+
+    def _read_exact(self, size):
+        """Return exactly size bytes from the connection."""
+        while len(self._rbuf) < size:
+            self._fill()
+        data = bytes(self._rbuf[:size])
+        del self._rbuf[:size]
+        return data
+
     def write(self, cmd):
         """Send SCPI command without expecting a response.
 
@@ -81,12 +208,49 @@ class iSocket:
             cmd (str): SCPI command to send.
         """
         try:
-            self.logger.info(f"Write: {cmd}")
-            self.sock.send(f"{cmd}\n".encode())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("W %s", cmd)
+            self.sock.sendall(_encode(cmd))
         except Exception as e:
-            self.logger.error(f"Write failed: {cmd}, Error: {e}")
+            logger.error("Write failed: %s, Error: %s", cmd, e)
+            self.close()  # A partial send leaves the instrument's parser mid-command
             raise
 
+    def write_many(self, cmds):
+        """Send several SCPI commands as one semicolon-chained message.
+
+        Args:
+            cmds (iterable of str): SCPI commands to send in order.
+        """
+        self.write(';'.join(cmds))
+
+    def write_opc(self, cmd, timeout=30):
+        """Send SCPI command and block until the instrument reports completion.
+
+        Args:
+            cmd (str): SCPI command to send.
+            timeout (float, optional): Socket timeout in seconds for this exchange.
+
+        Returns:
+            str: *OPC? response.
+        """
+        previous_timeout = self.set_timeout(timeout)
+        try:
+            return self.query(f'{cmd};*WAI;*OPC?')
+        finally:
+            self.set_timeout(previous_timeout)
+
+    def write_sync_many(self, cmds):
+        """Send several SCPI commands plus *OPC? as one exchange.
+
+        Args:
+            cmds (iterable of str): SCPI commands to send in order.
+
+        Returns:
+            str: *OPC? response.
+        """
+        return self.query(';'.join((*cmds, '*OPC?')))
+
     def queryFloat(self, cmd):
         """Send SCPI command and return response as float.
 
@@ -100,18 +264,19 @@ class iSocket:
 
     def clear_error(self):
         """Clear instrument error queue."""
-        self.logger.info("Clearing error queue")
+        logger.info("Clearing error queue")
         self.query(':SYST:ERR?')
 
-    def __del__(self):
-        """Close socket."""
-        if self.sock:
-            self.sock.close()
-            self.logger.info("Socket closed")
+    def __enter__(self):
+        """Return self so an opened connection can be used in a with-block."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the socket when leaving the with-block."""
+        self.close()
 
 
 if __name__ == '__main__':
     # Example usage
-    sock = iSocket()
-    sock.open('192.168.200.10', 5025)
-    print(sock.idn)
\ No newline at end of file
+    with iSocket().open('192.168.200.10', 5025) as sock:
+        print(sock.idn)
\ No newline at end of file
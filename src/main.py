@@ -1,235 +1,417 @@
 # File: main.py
 # Main script for running RF measurements (NR5G, LTE, SpurSearch, and STN focus)
+import dataclasses
+import functools
+import importlib.util
+import io
 import logging
 import os
 import json
+import pathlib
 import pandas as pd
-import statistics
 import numpy as np
 import re
 from src.measurements.nr5g_fr1 import std_insr_driver as NR5GDriver
 from src.measurements.lte import std_insr_driver as LTEDriver
 from src.measurements.spur_search import SpurSearch
 from src.measurements.SubThermalNoise import option_functions as STN
+from src.instruments.bench import bench
 from src.utils.utils import method_timer
 
-# Configure logging
+try:
+    import orjson  # Optional: faster JSON serialization with native NumPy support
+except ImportError:
+    orjson = None
+
+# Optional: xlsxwriter streams the workbook and supports native number formats
+_EXCEL_ENGINE = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') is not None else 'openpyxl'
+
 logger = logging.getLogger(__name__)
-log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
-os.makedirs(log_dir, exist_ok=True)
-
-# Create file handler for logging to project.log (DEBUG level)
-file_handler = logging.FileHandler(os.path.join(log_dir, 'project.log'))
-file_handler.setLevel(logging.DEBUG)
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-
-# Create console handler for output to console (INFO level)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)  # Only show INFO and above in console
-console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-
-# Configure the root logger
-logging.basicConfig(
-    level=logging.DEBUG,  # Set the root logger to DEBUG to capture all messages
-    handlers=[file_handler, console_handler]  # Use both handlers
+
+def _init_logging():
+    """Configure the root logger once: DEBUG to logs/project.log, INFO to the console."""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    log_dir = pathlib.Path(__file__).resolve().parent.parent / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    # Create file handler for logging to project.log (DEBUG level)
+    file_handler = logging.FileHandler(log_dir / 'project.log')
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    # Create console handler for output to console (INFO level)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)  # Only show INFO and above in console
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    # Configure the root logger
+    logging.basicConfig(
+        level=logging.DEBUG,  # Set the root logger to DEBUG to capture all messages
+        handlers=[file_handler, console_handler]  # Use both handlers
+    )
+
+# Parses the "Min:x Max:x Avg:x StdDev:x Delta:x" string from get_Array_stats
+_STN_STATS_RE = re.compile(r"(Min|Max|Avg|StdDev|Delta):([-+]?\d+\.\d+)")
+
+# Column order of the "Test Data" sheet
+_DF_COLUMNS = (
+    "Test Set", "Type", "Center Frequency (GHz)", "Power (dBm)", "Resource Blocks",
+    "Resource Block Offset", "Channel Bandwidth (MHz)", "Modulation Type", "Subcarrier Spacing (kHz)",
+    "Duplexing", "Link Direction", "Waveform File", "Setup File", "EVM (dB)", "VSA_get_EVM Time (s)",
+    "Channel Power (dBm)", "ACP Lower (dB)", "ACP Upper (dB)", "Alternate Lower (dB)",
+    "Alternate Upper (dB)", "VSA_get_ACLR Time (s)", "RBW (MHz)", "Spur Limit (dBm)",
+    "Spur Frequency (MHz)", "Spur Power (dBm)", "Spur Measurement Time (s)", "Get Results Time (s)",
+    "Iteration", "Marker (dBm)", "Marker Time (s)", "Stats Avg (dBm)", "Total Test Time (s)",
+    "Config Summary", "VSG_Config Time (s)", "VSA_Config Time (s)", "VSA_get_info Time (s)", "Error"
 )
 
-results = []
-previous_config = None
-previous_freq = None  # Track previous frequency
+# Test Data columns written as floats with 3 decimals
+_NUMERIC_COLUMNS = (
+    "Center Frequency (GHz)", "Power (dBm)", "EVM (dB)", "Channel Power (dBm)",
+    "ACP Lower (dB)", "ACP Upper (dB)", "Alternate Lower (dB)", "Alternate Upper (dB)",
+    "VSA_get_EVM Time (s)", "VSA_get_ACLR Time (s)", "Total Test Time (s)",
+    "VSG_Config Time (s)", "VSA_Config Time (s)", "VSA_get_info Time (s)",
+    "RBW (MHz)", "Spur Limit (dBm)", "Spur Frequency (MHz)", "Spur Power (dBm)",
+    "Spur Measurement Time (s)", "Get Results Time (s)", "Marker (dBm)", "Marker Time (s)",
+    "Stats Avg (dBm)"
+)
+_NUMERIC_COLUMN_INDEXES = tuple(_DF_COLUMNS.index(c) for c in _NUMERIC_COLUMNS)  # Positions in Test Data
+
+# Instrument setup timings left out of the per-result total test time
+_SETUP_TIMING_KEYS = frozenset(("VSG_Config", "VSA_Config"))
+
+@dataclasses.dataclass(slots=True)
+class MeasurementResult:
+    """One measurement record; fields not used by a measurement type stay None."""
+    test_set: int
+    type: str
+    center_frequency_hz: float = None
+    fundamental_frequency_hz: float = None
+    power_dbm: float = None
+    resource_blocks: int = None
+    resource_block_offset: int = None
+    channel_bandwidth_mhz: int = None
+    modulation_type: str = None
+    subcarrier_spacing_khz: int = None
+    duplexing: str = None
+    link_direction: str = None
+    waveform_file: str = None
+    setup_file: str = None
+    rbw_hz: float = None
+    spur_limit_dbm: float = None
+    spurs: list = None
+    sweep_time: float = None
+    iterations: int = None
+    markers: list = None
+    stats: str = None
+    total_test_time: float = None
+    evm: float = None
+    ch_pwr: float = None
+    acp_lower: float = None
+    acp_upper: float = None
+    alt_lower: float = None
+    alt_upper: float = None
+    config: str = None
+    timings: dict = dataclasses.field(default_factory=dict)
+    error: str = None
+
+class ResultWriter:
+    """Stream measurement results to an NDJSON file, one flushed line per record.
+
+    Results are durable as soon as they are measured and memory stays flat
+    during the run; read() loads them back for report assembly. Without a
+    path the records are kept in memory instead.
+    """
+
+    def __init__(self, path=None):
+        """Open path for writing, truncating results from a previous run; None buffers in memory."""
+        self.path = path
+        self._file = open(path, 'wb') if path else io.BytesIO()
+
+    def write(self, result):
+        """Append one MeasurementResult as a JSON line and flush it to disk."""
+        if orjson is not None:
+            line = orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        else:
+            line = json.dumps(dataclasses.asdict(result)).encode()
+        self._file.write(line)
+        self._file.write(b"\n")
+        self._file.flush()
+
+    def close(self):
+        """Close the NDJSON file; an in-memory writer keeps its records readable."""
+        if self.path:
+            self._file.close()
+
+    def _open_lines(self):
+        """Return a binary file object positioned at the first written record."""
+        if self.path:
+            return open(self.path, 'rb')
+        return io.BytesIO(self._file.getvalue())
+
+    def read(self):
+        """Return the written results as MeasurementResult records in test set order."""
+        loads = orjson.loads if orjson is not None else json.loads
+        with self._open_lines() as infile:
+            records = [MeasurementResult(**loads(line)) for line in infile if line.strip()]
+        records.sort(key=lambda r: r.test_set)
+        return records
+
+    def export_json(self, json_path):
+        """Copy the NDJSON records into a JSON array file line by line."""
+        with self._open_lines() as infile, open(json_path, 'wb') as outfile:
+            outfile.write(b"[")
+            separator = b"\n"
+            for line in infile:
+                line = line.strip()
+                if line:
+                    outfile.write(separator)
+                    outfile.write(line)
+                    separator = b",\n"
+            outfile.write(b"\n]\n")
+
+_writer = ResultWriter()  # In-memory by default; __main__ swaps in the NDJSON file writer
+
+_FMT_GHZ = "{:.3f} GHz".format
 
 def format_frequency(fundamental_ghz):
     """Format fundamental frequency for logging/display."""
     if isinstance(fundamental_ghz, (int, float)):
-        return f"{fundamental_ghz:.3f} GHz"
+        return _FMT_GHZ(fundamental_ghz)
     elif isinstance(fundamental_ghz, list):
-        return ", ".join(f"{freq:.3f} GHz" for freq in fundamental_ghz)
+        return ", ".join(map(_FMT_GHZ, fundamental_ghz))
     elif isinstance(fundamental_ghz, dict) and "range" in fundamental_ghz:
         r = fundamental_ghz["range"]
         return f"range {r['start_ghz']:.3f}–{r['stop_ghz']:.3f} GHz, step {r['step_mhz']} MHz"
     else:
         return str(fundamental_ghz)
 
-def run_nr5g_measurement(test_config, test_set, instr):
-    """Run NR5G measurement with specified configuration."""
-    global previous_config, previous_freq
-    try:
-        freq = test_config["center_frequency_ghz"] * 1e9
-        pwr = test_config["power_dbm"]
-        waveform_file = test_config.get("waveform_file", None)
-        setup_file = test_config.get("setup_file", None)
-        measure_aclr = test_config.get("measure_aclr", True)
-
-        current_config = {
-            "waveform_file": waveform_file,
-            "setup_file": setup_file
-        }
-
-        logger.info(f"Starting NR5G test set {test_set}: freq={freq / 1e9:.3f}GHz, pwr={pwr}dBm, "
-                    f"waveform_file={waveform_file}, setup_file={setup_file}")
-        timings = {}
-
-        if previous_config != current_config:
-            logger.info("Waveform configuration changed, reconfiguring VSA/VSG")
-            _, timings["VSG_Config"] = instr.VSG_Config()
-            _, timings["VSA_Config"] = instr.VSA_Config(freq=freq)
-            previous_config = current_config
-            previous_freq = freq  # Update frequency after VSA/VSG config
+@functools.lru_cache(maxsize=128)
+def _basename(path):
+    """Return the file name of path for config summaries, or 'default' if unset."""
+    return os.path.basename(path) if path else 'default'
+
+def _append_row(cols, row):
+    """Append one Test Data row to the per-column lists; columns missing from row get None."""
+    for name, column in cols.items():
+        column.append(row.get(name))
+
+def _extend_rows(cols, row, count, per_row):
+    """Append count Test Data rows sharing row's values, except the per_row columns.
+
+    Args:
+        cols (dict): Column name to list of values.
+        row (dict): Values repeated on every row; missing columns get None.
+        count (int): Number of rows to append.
+        per_row (dict): Column name to a sequence of count per-row values.
+    """
+    for name, column in cols.items():
+        if name in per_row:
+            column.extend(per_row[name])
         else:
-            logger.info("Waveform configuration unchanged, skipping VSA/VSG config")
+            column.extend([row.get(name)] * count)
+
+def frequency_range_ghz(start_ghz, stop_ghz, step_mhz):
+    """Return an exact frequency grid in GHz from start up to stop.
+
+    Stepping is done on integer kHz so the point count is not subject to
+    floating-point rounding. Points are exactly step_mhz apart, so stop is
+    included only when the span is a whole number of steps; otherwise the grid
+    ends at the last step below stop (1.0 to 1.003 GHz in 2 MHz steps gives
+    [1.0, 1.002]). step_mhz must round to at least 1 kHz.
+    """
+    start_khz = round(start_ghz * 1e6)
+    stop_khz = round(stop_ghz * 1e6)
+    step_khz = round(step_mhz * 1e3)
+    n = (stop_khz - start_khz) // step_khz + 1
+    return (np.arange(n, dtype=np.int64) * step_khz + start_khz).astype(np.float64) / 1e6
+
+def _median(arr):
+    """Return the median of a non-empty 1-D array using O(n) selection instead of a sort."""
+    mid = arr.size // 2
+    if arr.size % 2:
+        return np.partition(arr, mid)[mid]
+    lower, upper = np.partition(arr, (mid - 1, mid))[mid - 1:mid + 1]
+    return 0.5 * (lower + upper)
+
+def _stats(values):
+    """Return (total, mean, median) of values as floats; mean and median are 0 when empty."""
+    arr = np.asarray(values, dtype=np.float64)
+    if not arr.size:
+        return 0.0, 0.0, 0.0
+    return float(arr.sum()), float(arr.mean()), float(_median(arr))
+
+def _expand_freqs(spec):
+    """Expand a frequency spec from test_inputs.json into an array of GHz values.
+
+    Args:
+        spec: Scalar GHz value, list of GHz values, or {"range": {"start_ghz",
+            "stop_ghz", "step_mhz"}}.
+
+    Returns:
+        np.ndarray: Frequencies in GHz.
+
+    Raises:
+        ValueError: If the spec or its range parameters are invalid.
+    """
+    if isinstance(spec, dict) and "range" in spec:
+        range_config = spec["range"]
+        start_ghz = range_config.get("start_ghz")
+        stop_ghz = range_config.get("stop_ghz")
+        step_mhz = range_config.get("step_mhz")
+        if None in [start_ghz, stop_ghz, step_mhz]:
+            raise ValueError(f"Missing range parameters: {range_config}")
+        if not all(isinstance(x, (int, float)) for x in [start_ghz, stop_ghz, step_mhz]):
+            raise ValueError(f"Invalid range parameter types: {range_config}")
+        if start_ghz > stop_ghz:
+            raise ValueError(f"Start frequency ({start_ghz} GHz) exceeds stop ({stop_ghz} GHz)")
+        if step_mhz <= 0:
+            raise ValueError(f"Invalid step size: {step_mhz} MHz")
+        if round(step_mhz * 1e3) < 1:
+            raise ValueError(f"Step size {step_mhz} MHz is below the 1 kHz grid resolution")
+        return frequency_range_ghz(start_ghz, stop_ghz, step_mhz)
+    if isinstance(spec, (list, float, int)) and not isinstance(spec, bool):
+        return np.asarray(spec if isinstance(spec, list) else [spec], dtype=np.float64)
+    raise ValueError(f"Invalid frequency format: {spec}")
+
+def _run_cellular_measurement(kind, test, freq_ghz, pwr_dbm, test_set, instr, setup_timings=None):
+    """Run an NR5G or LTE measurement with specified configuration.
+
+    VSA/VSG configuration and frequency changes are done by the caller; their
+    timings for this test set are passed in through setup_timings.
+
+    Args:
+        kind (str): "NR5G" or "LTE".
+        test (dict): Test template; waveform_file, setup_file and measure_aclr are read from it.
+        freq_ghz (float): Center frequency in GHz for this test set.
+        pwr_dbm (float): VSG power in dBm for this test set.
+        test_set (int): Test set number.
+        instr: NR5G or LTE driver instance.
+        setup_timings (dict, optional): VSG_Config/VSA_Config/VSx_freq timings to record.
+    """
+    try:
+        freq = int(round(freq_ghz * 1e9))  # Integer Hz
+        waveform_file = test.get("waveform_file", None)
+        setup_file = test.get("setup_file", None)
+        measure_aclr = test.get("measure_aclr", True)
 
-        # Use tolerance for floating-point comparison
-        if previous_freq is None or abs(previous_freq - freq) > 1e-3:
-            logger.info(f"Frequency changed, setting VSA/VSG to {freq / 1e9:.3f}GHz")
-            _, timings["VSx_freq"] = instr.VSx_freq(freq=freq)
-            previous_freq = freq
-        else:
-            logger.info("Frequency unchanged, skipping VSx_freq")
-            timings["VSx_freq"] = 0.0  # Log zero time when skipped
+        logger.info("Starting %s test set %d: freq=%.3fGHz, pwr=%sdBm, waveform_file=%s, setup_file=%s",
+                    kind, test_set, freq / 1e9, pwr_dbm, waveform_file, setup_file)
+        timings = dict(setup_timings) if setup_timings else {}
 
-        instr.VSG_pwr(pwr=pwr)
+        instr.VSG_pwr(pwr=pwr_dbm)
         config_result, timings["VSA_get_info"] = instr.VSA_get_info()
+        # Snapshot driver waveform parameters once for the config summary and result record
+        snap = instr.snapshot()
+        scs_tag = "15kHz" if kind == "LTE" else snap.scs
         # Construct config summary to include waveform-specific parameters
         config = (
-            f"{freq / 1e9:.3f}GHz_"
-            f"{getattr(instr, 'bw', 10)}MHz_"
-            f"{getattr(instr, 'dupl', 'FDD')}_"
-            f"{getattr(instr, 'ldir', 'UL')}_"
-            f"{getattr(instr, 'scs', 30)}_{getattr(instr, 'rb', 24)}RB_"
-            f"{getattr(instr, 'rbo', 0)}RBO_"
-            f"{getattr(instr, 'mod', '256QAM')}_"
-            f"waveform_{os.path.basename(waveform_file) if waveform_file else 'default'}_"
-            f"setup_{os.path.basename(setup_file) if setup_file else 'default'}"
+            f"{freq / 1e9:.3f}GHz_{snap.bw}MHz_{snap.dupl}_{snap.ldir}_{scs_tag}_{snap.rb}RB_{snap.rbo}RBO_{snap.mod}_"
+            f"waveform_{_basename(waveform_file)}_setup_{_basename(setup_file)}"
         )
         _, timings["VSA_sweep_evm"] = instr.VSA_sweep()
         evm, timings["VSA_get_EVM"] = instr.VSA_get_EVM()
-        logger.info(f"NR5G EVM: {evm:.2f} dB")
+        logger.info("%s EVM: %.2f dB", kind, evm)
         ch_pwr = acp_l = acp_u = alt_l = alt_u = None
         timings["VSA_get_ACLR"] = 0.0  # Default in case ACLR is not measured
         if measure_aclr:
             aclr_vals, timings["VSA_get_ACLR"] = instr.VSA_get_ACLR()
-            logger.info(f"NR5G ACLR: {aclr_vals}")
+            logger.info("%s ACLR: %s", kind, aclr_vals)
             if aclr_vals:
-                aclr_parts = aclr_vals.split(',')
-                if len(aclr_parts) == 5:
-                    ch_pwr, acp_l, acp_u, alt_l, alt_u = map(float, aclr_parts)
-        results.append({
-            "test_set": test_set,
-            "type": "NR5G",
-            "center_frequency_hz": float(freq),
-            "power_dbm": float(pwr),
-            "resource_blocks": getattr(instr, 'rb', None),
-            "resource_block_offset": getattr(instr, 'rbo', None),
-            "channel_bandwidth_mhz": getattr(instr, 'bw', None),
-            "modulation_type": getattr(instr, 'mod', None),
-            "subcarrier_spacing_khz": getattr(instr, 'scs', None),
-            "duplexing": getattr(instr, 'dupl', None),
-            "link_direction": getattr(instr, 'ldir', None),
-            "waveform_file": waveform_file,
-            "setup_file": setup_file,
-            "config": config,
-            "evm": float(evm) if evm is not None else None,
-            "ch_pwr": float(ch_pwr) if ch_pwr is not None else None,
-            "acp_lower": float(acp_l) if acp_l is not None else None,
-            "acp_upper": float(acp_u) if acp_u is not None else None,
-            "alt_lower": float(alt_l) if alt_l is not None else None,
-            "alt_upper": float(alt_u) if alt_u is not None else None,
-            "timings": timings
-        })
+                aclr_arr = np.fromstring(aclr_vals, sep=',', dtype=np.float64)
+                if aclr_arr.size == 5:
+                    ch_pwr, acp_l, acp_u, alt_l, alt_u = aclr_arr.tolist()
+        _writer.write(MeasurementResult(
+            test_set=test_set,
+            type=kind,
+            center_frequency_hz=float(freq),
+            power_dbm=float(pwr_dbm),
+            resource_blocks=snap.rb,
+            resource_block_offset=snap.rbo,
+            channel_bandwidth_mhz=snap.bw,
+            modulation_type=snap.mod,
+            subcarrier_spacing_khz=snap.scs,
+            duplexing=snap.dupl,
+            link_direction=snap.ldir,
+            waveform_file=waveform_file,
+            setup_file=setup_file,
+            config=config,
+            evm=float(evm) if evm is not None else None,
+            ch_pwr=float(ch_pwr) if ch_pwr is not None else None,
+            acp_lower=float(acp_l) if acp_l is not None else None,
+            acp_upper=float(acp_u) if acp_u is not None else None,
+            alt_lower=float(alt_l) if alt_l is not None else None,
+            alt_upper=float(alt_u) if alt_u is not None else None,
+            timings=timings
+        ))
     except Exception as e:
-        logger.error(f"NR5G test set {test_set} failed: {e}", exc_info=True)
+        logger.error(f"{kind} test set {test_set} failed: {e}", exc_info=True)
+
+def run_nr5g_measurement(test, freq_ghz, pwr_dbm, test_set, instr, setup_timings=None):
+    """Run NR5G measurement with specified configuration."""
+    _run_cellular_measurement("NR5G", test, freq_ghz, pwr_dbm, test_set, instr, setup_timings)
 
-def run_lte_measurement(test_config, test_set, instr):
+def run_lte_measurement(test, freq_ghz, pwr_dbm, test_set, instr, setup_timings=None):
     """Run LTE measurement with specified configuration."""
-    global previous_config, previous_freq
+    _run_cellular_measurement("LTE", test, freq_ghz, pwr_dbm, test_set, instr, setup_timings)
+
+def run_cellular_test(kind, driver_cls, runner, test, frequencies, test_set):
+    """Configure an NR5G or LTE driver once per waveform and sweep frequency and power.
+
+    Args:
+        kind (str): "NR5G" or "LTE".
+        driver_cls: Driver class (NR5GDriver or LTEDriver).
+        runner (callable): run_nr5g_measurement or run_lte_measurement.
+        test (dict): Test template from test_inputs.json.
+        frequencies (np.ndarray): Center frequencies in GHz.
+        test_set (int): First test set number.
+
+    Returns:
+        int: Next free test set number.
+    """
+    instr = None
     try:
-        freq = test_config["center_frequency_ghz"] * 1e9
-        pwr = test_config["power_dbm"]
-        waveform_file = test_config.get("waveform_file", None)
-        setup_file = test_config.get("setup_file", None)
-        measure_aclr = test_config.get("measure_aclr", True)
-
-        current_config = {
-            "waveform_file": waveform_file,
-            "setup_file": setup_file
-        }
-
-        logger.info(f"Starting LTE test set {test_set}: freq={freq / 1e9:.3f}GHz, pwr={pwr}dBm, "
-                    f"waveform_file={waveform_file}, setup_file={setup_file}")
-        timings = {}
-
-        if previous_config != current_config:
-            logger.info("Waveform configuration changed, reconfiguring VSA/VSG")
-            _, timings["VSG_Config"] = instr.VSG_Config()
-            _, timings["VSA_Config"] = instr.VSA_Config(freq=freq)
-            previous_config = current_config
-            previous_freq = freq  # Update frequency after VSA/VSG config
-        else:
-            logger.info("Waveform configuration unchanged, skipping VSA/VSG config")
-
-        # Use tolerance for floating-point comparison
-        if previous_freq is None or abs(previous_freq - freq) > 1e-3:
-            logger.info(f"Frequency changed, setting VSA/VSG to {freq / 1e9:.3f}GHz")
-            _, timings["VSx_freq"] = instr.VSx_freq(freq=freq)
-            previous_freq = freq
-        else:
-            logger.info("Frequency unchanged, skipping VSx_freq")
-            timings["VSx_freq"] = 0.0  # Log zero time when skipped
-
-        instr.VSG_pwr(pwr=pwr)
-        config_result, timings["VSA_get_info"] = instr.VSA_get_info()
-        # Construct config summary to include waveform-specific parameters
-        config = (
-            f"{freq / 1e9:.3f}GHz_"
-            f"{getattr(instr, 'bw', 20)}MHz_"
-            f"{getattr(instr, 'dupl', 'FDD')}_"
-            f"{getattr(instr, 'ldir', 'UL')}_15kHz_"
-            f"{getattr(instr, 'rb', 100)}RB_"
-            f"{getattr(instr, 'rbo', 0)}RBO_"
-            f"{getattr(instr, 'mod', 'QAM256')}_"
-            f"waveform_{os.path.basename(waveform_file) if waveform_file else 'default'}_"
-            f"setup_{os.path.basename(setup_file) if setup_file else 'default'}"
+        instr = driver_cls(
+            freq=frequencies[0] * 1e9,
+            pwr=test["power_dbm"][0],
+            waveform_file=test.get("waveform_file", None),
+            setup_file=test.get("setup_file", None)
         )
-        _, timings["VSA_sweep_evm"] = instr.VSA_sweep()
-        evm, timings["VSA_get_EVM"] = instr.VSA_get_EVM()
-        logger.info(f"LTE EVM: {evm:.2f} dB")
-        ch_pwr = acp_l = acp_u = alt_l = alt_u = None
-        timings["VSA_get_ACLR"] = 0.0  # Default in case ACLR is not measured
-        if measure_aclr:
-            aclr_vals, timings["VSA_get_ACLR"] = instr.VSA_get_ACLR()
-            logger.info(f"LTE ACLR: {aclr_vals}")
-            if aclr_vals:
-                aclr_parts = aclr_vals.split(',')
-                if len(aclr_parts) == 5:
-                    ch_pwr, acp_l, acp_u, alt_l, alt_u = map(float, aclr_parts)
-        results.append({
-            "test_set": test_set,
-            "type": "LTE",
-            "center_frequency_hz": float(freq),
-            "power_dbm": float(pwr),
-            "resource_blocks": getattr(instr, 'rb', None),
-            "resource_block_offset": getattr(instr, 'rbo', None),
-            "channel_bandwidth_mhz": getattr(instr, 'bw', None),
-            "modulation_type": getattr(instr, 'mod', None),
-            "subcarrier_spacing_khz": 15,  # Fixed for LTE
-            "duplexing": getattr(instr, 'dupl', None),
-            "link_direction": getattr(instr, 'ldir', None),
-            "waveform_file": waveform_file,
-            "setup_file": setup_file,
-            "config": config,
-            "evm": float(evm) if evm is not None else None,
-            "ch_pwr": float(ch_pwr) if ch_pwr is not None else None,
-            "acp_lower": float(acp_l) if acp_l is not None else None,
-            "acp_upper": float(acp_u) if acp_u is not None else None,
-            "alt_lower": float(alt_l) if alt_l is not None else None,
-            "alt_upper": float(alt_u) if alt_u is not None else None,
-            "timings": timings
-        })
+        # Configure once per waveform; VSA_Config also tunes to the first frequency
+        setup_timings = {}
+        _, setup_timings["VSG_Config"] = instr.VSG_Config()
+        current_freq_hz = int(round(frequencies[0] * 1e9))
+        _, setup_timings["VSA_Config"] = instr.VSA_Config(freq=current_freq_hz)
+        setup_timings["VSx_freq"] = 0.0
+        for freq in frequencies:
+            # Frequencies are compared as integer Hz, below instrument resolution
+            freq_hz = int(round(freq * 1e9))
+            if freq_hz != current_freq_hz:
+                _, setup_timings["VSx_freq"] = instr.VSx_freq(freq=freq_hz)
+                current_freq_hz = freq_hz
+            for pwr in test["power_dbm"]:
+                print(f"\n=== Test Set {test_set} ({kind}) ===")
+                runner(test, freq, pwr, test_set, instr, setup_timings)
+                setup_timings = {"VSx_freq": 0.0}  # Later power points reuse the setup
+                test_set += 1
     except Exception as e:
-        logger.error(f"LTE test set {test_set} failed: {e}", exc_info=True)
+        logger.error(f"{kind} test initialization failed: {e}", exc_info=True)
+    finally:
+        if instr:
+            try:
+                driver_cls.close_connections()
+            except Exception as e:
+                logger.error(f"Error closing {kind} connections: {e}", exc_info=True)
+    return test_set
+
+def run_spur_search_measurement(test_config, test_set, instr, reset=True):
+    """Run spur search measurement.
 
-def run_spur_search_measurement(test_config, test_set, instr):
-    """Run spur search measurement."""
+    With reset=False the instruments skip *RST and are reconfigured in place,
+    which is safe once an earlier point has set them up.
+    """
     try:
         fundamental_ghz = test_config["fundamental_frequency_ghz"]
         rbw_mhz = test_config.get("rbw_mhz", 0.01)
@@ -242,115 +424,196 @@ def run_spur_search_measurement(test_config, test_set, instr):
             logger.error(f"Range input not supported in run_spur_search_measurement: {fundamental_ghz}")
             raise ValueError("Range input should be processed in main loop")
 
-        logger.info(f"Starting SpurSearch test set {test_set}: fundamental={format_frequency(fundamental_ghz)}, "
-                    f"RBW={rbw_mhz:.3f} MHz, limit={spur_limit_dbm:.2f} dBm, power={pwr:.2f} dBm")
+        logger.info("Starting SpurSearch test set %d: fundamental=%.3f GHz, RBW=%.3f MHz, limit=%.2f dBm, power=%.2f dBm",
+                    test_set, fundamental_ghz, rbw_mhz, spur_limit_dbm, pwr)
         timings = {}
 
-        _, timings["VSG_config"] = instr.VSG_config(frequency_ghz=fundamental_ghz, pwr=pwr)
-        _, timings["VSA_config"] = instr.VSA_config(fundamental_ghz=fundamental_ghz, rbw_mhz=rbw_mhz, spur_limit_dbm=spur_limit_dbm)
+        # One compound setup message per instrument, sent concurrently; recorded under
+        # the same setup keys as the other measurements. RBW, limit and power come from
+        # the same test config the SpurSearch instance was built with.
+        timings.update(instr.setup(fundamental_ghz, reset=reset))
 
         _, timings["measure"] = instr.measure()
         results_data, timings["get_results"] = instr.get_results()
-        logger.debug(f"SpurSearch results for {fundamental_ghz:.3f} GHz: {results_data}")
+        logger.debug("SpurSearch results for %.3f GHz: %s", fundamental_ghz, results_data)
 
         config = f"{fundamental_ghz:.3f}GHz_Spur_RBW{rbw_mhz:.3f}MHz_Limit{spur_limit_dbm:.2f}dBm"
-        result = {
-            "test_set": test_set,
-            "type": "SpurSearch",
-            "fundamental_frequency_hz": float(fundamental_ghz) * 1e9,
-            "rbw_hz": rbw_mhz * 1e6,
-            "spur_limit_dbm": spur_limit_dbm,
-            "power_dbm": pwr,
-            "spurs": [{"frequency_hz": freq_hz, "power_dbm": power_dbm} for freq_hz, power_dbm in results_data],
-            "config": config,
-            "timings": timings.copy()
-        }
+        result = MeasurementResult(
+            test_set=test_set,
+            type="SpurSearch",
+            fundamental_frequency_hz=float(fundamental_ghz) * 1e9,
+            rbw_hz=rbw_mhz * 1e6,
+            spur_limit_dbm=spur_limit_dbm,
+            power_dbm=pwr,
+            spurs=[{"frequency_hz": freq_hz, "power_dbm": power_dbm} for freq_hz, power_dbm in results_data],
+            config=config,
+            timings=timings.copy()
+        )
         if not results_data:
-            result["error"] = "No spurs detected"
-        results.append(result)
+            result.error = "No spurs detected"
+        _writer.write(result)
         return test_set + 1
     except Exception as e:
         logger.error(f"SpurSearch test set {test_set} failed: {e}", exc_info=True)
-        results.append({
-            "test_set": test_set,
-            "type": "SpurSearch",
-            "fundamental_frequency_hz": None,
-            "rbw_hz": rbw_mhz * 1e6,
-            "spur_limit_dbm": spur_limit_dbm,
-            "power_dbm": pwr,
-            "spurs": [],
-            "config": f"Spur_RBW{rbw_mhz:.3f}MHz_Limit{spur_limit_dbm:.2f}dBm",
-            "timings": timings,
-            "error": str(e)
-        })
+        _writer.write(MeasurementResult(
+            test_set=test_set,
+            type="SpurSearch",
+            fundamental_frequency_hz=None,
+            rbw_hz=rbw_mhz * 1e6,
+            spur_limit_dbm=spur_limit_dbm,
+            power_dbm=pwr,
+            spurs=[],
+            config=f"Spur_RBW{rbw_mhz:.3f}MHz_Limit{spur_limit_dbm:.2f}dBm",
+            timings=timings,
+            error=str(e)
+        ))
         return test_set + 1
 
+def _run_spur_point(test, freq_ghz, test_set, reset=True):
+    """Initialize SpurSearch for one fundamental, run it, and release the instruments."""
+    spur_instr = None
+    try:
+        logger.info("Initializing SpurSearch for %.3f GHz", freq_ghz)
+        spur_instr = SpurSearch(
+            fundamental_ghz=freq_ghz,
+            rbw_mhz=test.get("rbw_mhz", 0.01),
+            spur_limit_dbm=test.get("spur_limit_dbm", -95),
+            pwr=test.get("power_dbm", -70)
+        )
+        print(f"\n=== Test Set {test_set} (SpurSearch) ===")
+        print(f"SpurSearch Fundamental: {format_frequency(freq_ghz)}")
+        run_spur_search_measurement(dict(test, fundamental_frequency_ghz=float(freq_ghz)), test_set, spur_instr, reset)
+    except Exception as e:
+        logger.error(f"SpurSearch test set {test_set} for {freq_ghz:.3f} GHz failed: {e}", exc_info=True)
+    finally:
+        if spur_instr:
+            try:
+                spur_instr.close()
+            except Exception as e:
+                logger.error(f"Error closing SpurSearch for {freq_ghz:.3f} GHz: {e}")
+
+def run_spur_search_points(test, frequencies, test_set):
+    """Run SpurSearch at each fundamental frequency in turn.
+
+    All points share the one pooled VSA/VSG connection pair, and the FSW can
+    only sweep one fundamental at a time, so the points run serially.
+
+    Returns:
+        int: Next free test set number.
+    """
+    for offset, freq_ghz in enumerate(frequencies):
+        # Only the first point needs the instruments reset
+        _run_spur_point(test, freq_ghz, test_set + offset, reset=offset == 0)
+    return test_set + len(frequencies)
+
 def run_stn_measurement(stn_instr, freq, test_set, swp_time=1.0, iterations=5):
     """Run STN measurement with specified configuration."""
-    logger.debug(f"Starting STN test set {test_set}: freq={freq / 1e9:.3f}GHz, iterations={iterations}")
+    logger.debug("Starting STN test set %d: freq=%.3fGHz, iterations=%d", test_set, freq / 1e9, iterations)
     try:
         timings = {}
         total_test_time = 0.0
         logger.debug("Calling VSA_Config")
         _, timings["VSA_Config"] = stn_instr.VSA_Config()
         total_test_time += timings["VSA_Config"]
-        meas = []
+        markers = np.full(iterations, np.nan)
+        meas_times = np.zeros(iterations)
+        freq_ghz = stn_instr.frequency / 1e9
         print('Frequency, NoiseMkr, CapTime, MeasTime')
         for i in range(iterations):
-            logger.debug(f"Running STN iteration {i + 1}")
+            logger.debug("Running STN iteration %d", i + 1)
             try:
                 marker, delta_time = stn_instr.get_VSA_sweep_noise_mkr()
                 if delta_time is None:
-                    logger.warning(f"STN iteration {i + 1}: No timing returned, using 0.0")
+                    logger.warning("STN iteration %d: No timing returned, using 0.0", i + 1)
                     delta_time = 0.0
-                meas.append({"marker": float(marker), "meas_time": float(delta_time)})
-                logger.info(f"STN iteration {i + 1}: marker={marker:.2f}dBm, meas_time={delta_time:.3f}sec")
-                print(f'{stn_instr.frequency / 1e9:7.3f}, {marker:.2f}dBm, {delta_time:.3f}sec, {delta_time:.3f}sec')
+                markers[i] = marker
+                meas_times[i] = delta_time
+                logger.info("STN iteration %d: marker=%.2fdBm, meas_time=%.3fsec", i + 1, marker, delta_time)
+                print(f'{freq_ghz:7.3f}, {marker:.2f}dBm, {delta_time:.3f}sec, {delta_time:.3f}sec')
                 timings[f"get_VSA_sweep_noise_mkr_{i + 1}"] = delta_time
                 total_test_time += delta_time
             except Exception as e:
                 logger.error(f"STN iteration {i + 1} failed: {e}", exc_info=True)
-                meas.append({"marker": None, "meas_time": 0.0})
                 timings[f"get_VSA_sweep_noise_mkr_{i + 1}"] = 0.0
         stats = None
-        valid_markers = [m["marker"] for m in meas if m["marker"] is not None]
-        if len(valid_markers) >= 2:
-            stats = stn_instr.get_Array_stats(np.array(valid_markers))
-            logger.info(f"STN stats: {stats}")
-        freq_ghz = freq / 1e9
-        config = f"{freq_ghz:.3f}GHz_STN_{swp_time:.1f}sec"
-        result = {
-            "test_set": test_set,
-            "type": "STN",
-            "center_frequency_hz": freq,
-            "sweep_time": swp_time,
-            "iterations": iterations,
-            "config": config,
-            "markers": meas,
-            "stats": stats,
-            "timings": timings,
-            "total_test_time": total_test_time
-        }
-        if not valid_markers:
-            result["error"] = "No successful measurements"
-        results.append(result)
+        valid_markers = markers[~np.isnan(markers)]
+        if valid_markers.size >= 2:
+            stats = stn_instr.get_Array_stats(valid_markers)
+            logger.info("STN stats: %s", stats)
+        meas = [{"marker": None if np.isnan(m) else m, "meas_time": t}
+                for m, t in zip(markers.tolist(), meas_times.tolist())]
+        config = f"{freq / 1e9:.3f}GHz_STN_{swp_time:.1f}sec"
+        result = MeasurementResult(
+            test_set=test_set,
+            type="STN",
+            center_frequency_hz=freq,
+            sweep_time=swp_time,
+            iterations=iterations,
+            config=config,
+            markers=meas,
+            stats=stats,
+            timings=timings,
+            total_test_time=total_test_time
+        )
+        if not valid_markers.size:
+            result.error = "No successful measurements"
+        _writer.write(result)
     except Exception as e:
         logger.error(f"STN measurement failed for test set {test_set}: {e}", exc_info=True)
-        results.append({
-            "test_set": test_set,
-            "type": "STN",
-            "center_frequency_hz": freq,
-            "sweep_time": swp_time,
-            "iterations": iterations,
-            "config": f"{freq / 1e9:.3f}GHz_STN_{swp_time:.1f}sec",
-            "markers": [],
-            "stats": None,
-            "timings": {},
-            "total_test_time": 0.0,
-            "error": str(e)
-        })
+        _writer.write(MeasurementResult(
+            test_set=test_set,
+            type="STN",
+            center_frequency_hz=freq,
+            sweep_time=swp_time,
+            iterations=iterations,
+            config=f"{freq / 1e9:.3f}GHz_STN_{swp_time:.1f}sec",
+            markers=[],
+            stats=None,
+            timings={},
+            total_test_time=0.0,
+            error=str(e)
+        ))
+
+def run_stn_test(test, frequencies, test_set):
+    """Run STN measurements at each frequency, reusing the instrument connections.
+
+    Returns:
+        int: Next free test set number.
+    """
+    iterations = test.get("iterations", 5)
+    stn_instr = None
+    try:
+        for freq in frequencies:
+            logger.info("Preparing STN test set %d at %.3f GHz", test_set, freq)
+            print(f"\n=== Test Set {test_set} (STN) ===")
+            print(f"STN Freq: {freq:.3f} GHz, Iterations: {iterations}")
+            try:
+                # Connections are shared class-wide, so later points reuse the open sockets
+                stn_instr = STN(freq=freq * 1e9)
+                run_stn_measurement(stn_instr, freq * 1e9, test_set, iterations=iterations)
+            except Exception as e:
+                logger.error(f"STN test set {test_set} failed: {e}", exc_info=True)
+            test_set += 1
+    finally:
+        if stn_instr:
+            try:
+                stn_instr.close_connections()
+            except Exception as e:
+                logger.error(f"Error closing STN connections: {e}")
+    return test_set
+
+# (inputs key, frequency key, runner(test, frequencies, test_set) -> next test set)
+MEAS_KINDS = (
+    ("nr5g", "center_frequency_ghz",
+     functools.partial(run_cellular_test, "NR5G", NR5GDriver, run_nr5g_measurement)),
+    ("lte", "center_frequency_ghz",
+     functools.partial(run_cellular_test, "LTE", LTEDriver, run_lte_measurement)),
+    ("spur_search", "fundamental_frequency_ghz", run_spur_search_points),
+    ("STN", "center_frequency_ghz", run_stn_test),
+)
 
 if __name__ == '__main__':
+    _init_logging()
     logger.info("Starting RF measurement script")
     json_path = os.path.join(os.path.dirname(__file__), 'test_inputs.json')
     default_inputs = {
@@ -403,295 +666,128 @@ if __name__ == '__main__':
         print(f"Error reading JSON file: {e}")
         inputs = default_inputs
 
-    logger.debug(f"Test inputs: {json.dumps(inputs, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Test inputs: %s", json.dumps(inputs, indent=2))
 
+    _writer = ResultWriter(os.path.join(os.path.dirname(__file__), 'results_output.ndjson'))
     test_set = 1
-    instr = None
-    # Run NR5G tests
-    for test in inputs.get("nr5g", []):
-        if test.get("run", False):
-            logger.debug(f"Processing NR5G test: {test}")
-            frequencies = test["center_frequency_ghz"] if isinstance(test["center_frequency_ghz"], list) else [
-                test["center_frequency_ghz"]]
-            try:
-                instr = NR5GDriver(
-                    freq=frequencies[0] * 1e9,
-                    pwr=test["power_dbm"][0],
-                    waveform_file=test.get("waveform_file", None),
-                    setup_file=test.get("setup_file", None)
-                )
-                for freq in frequencies:
-                    for pwr in test["power_dbm"]:
-                        test_config = test.copy()
-                        test_config["center_frequency_ghz"] = freq
-                        test_config["power_dbm"] = pwr
-                        print(f"\n=== Test Set {test_set} (NR5G) ===")
-                        run_nr5g_measurement(test_config, test_set, instr)
-                        test_set += 1
-            except Exception as e:
-                logger.error(f"NR5G test initialization failed: {e}", exc_info=True)
-            finally:
-                if instr:
-                    try:
-                        NR5GDriver.close_connections()
-                    except Exception as e:
-                        logger.error(f"Error closing NR5G connections: {e}", exc_info=True)
-                instr = None
-
-    # Run LTE tests
-    for test in inputs.get("lte", []):
-        if test.get("run", False):
-            logger.debug(f"Processing LTE test: {test}")
-            frequencies = test["center_frequency_ghz"] if isinstance(test["center_frequency_ghz"], list) else [
-                test["center_frequency_ghz"]]
-            try:
-                instr = LTEDriver(
-                    freq=frequencies[0] * 1e9,
-                    pwr=test["power_dbm"][0],
-                    waveform_file=test.get("waveform_file", None),
-                    setup_file=test.get("setup_file", None)
-                )
-                for freq in frequencies:
-                    for pwr in test["power_dbm"]:
-                        test_config = test.copy()
-                        test_config["center_frequency_ghz"] = freq
-                        test_config["power_dbm"] = pwr
-                        print(f"\n=== Test Set {test_set} (LTE) ===")
-                        run_lte_measurement(test_config, test_set, instr)
-                        test_set += 1
-            except Exception as e:
-                logger.error(f"LTE test initialization failed: {e}", exc_info=True)
-            finally:
-                if instr:
-                    try:
-                        LTEDriver.close_connections()
-                    except Exception as e:
-                        logger.error(f"Error closing LTE connections: {e}", exc_info=True)
-                instr = None
-
-    # Run SpurSearch tests
-    spur_instr = None
-    for test in inputs.get("spur_search", []):
-        if test.get("run", False):
-            logger.debug(f"Processing SpurSearch test: {test}")
-            fundamental_ghz = test["fundamental_frequency_ghz"]
-            if isinstance(fundamental_ghz, dict) and "range" in fundamental_ghz:
-                range_config = fundamental_ghz["range"]
-                start_ghz = range_config.get("start_ghz")
-                stop_ghz = range_config.get("stop_ghz")
-                step_mhz = range_config.get("step_mhz")
-                if None in [start_ghz, stop_ghz, step_mhz]:
-                    logger.error(f"Invalid range parameters: {range_config}")
-                    continue
-                frequencies = np.linspace(start_ghz, stop_ghz,
-                                         int((stop_ghz - start_ghz) / (step_mhz / 1000.0)) + 1).tolist()
-            elif isinstance(fundamental_ghz, (list, float, int)):
-                frequencies = fundamental_ghz if isinstance(fundamental_ghz, list) else [fundamental_ghz]
-            else:
-                logger.error(f"Invalid fundamental_frequency_ghz format: {fundamental_ghz}")
+    for kind, freq_key, run_test in MEAS_KINDS:
+        for test in inputs.get(kind, []):
+            if not test.get("run", False):
                 continue
-
-            for freq_ghz in frequencies:
-                try:
-                    logger.info(f"Initializing SpurSearch for {freq_ghz:.3f} GHz")
-                    spur_instr = SpurSearch(
-                        fundamental_ghz=freq_ghz,
-                        rbw_mhz=test.get("rbw_mhz", 0.01),
-                        spur_limit_dbm=test.get("spur_limit_dbm", -95),
-                        pwr=test.get("power_dbm", -70)
-                    )
-                    print(f"\n=== Test Set {test_set} (SpurSearch) ===")
-                    print(f"SpurSearch Fundamental: {format_frequency(freq_ghz)}")
-                    test_set = run_spur_search_measurement(test, test_set, spur_instr)
-                except Exception as e:
-                    logger.error(f"SpurSearch test set {test_set} for {freq_ghz:.3f} GHz failed: {e}", exc_info=True)
-                    test_set += 1
-                finally:
-                    if spur_instr:
-                        try:
-                            spur_instr.close()
-                        except Exception as e:
-                            logger.error(f"Error closing SpurSearch for {freq_ghz:.3f} GHz: {e}")
-                        spur_instr = None
-
-    # Run STN tests
-    stn_instr = None
-    for test in inputs.get("STN", []):
-        if test.get("run", False):
-            logger.debug(f"Processing STN test: {test}")
-            freq_input = test.get("center_frequency_ghz")
+            logger.debug("Processing %s test: %s", kind, test)
             try:
-                if isinstance(freq_input, dict) and "range" in freq_input:
-                    range_config = freq_input["range"]
-                    start_ghz = range_config.get("start_ghz")
-                    stop_ghz = range_config.get("stop_ghz")
-                    step_mhz = range_config.get("step_mhz")
-                    if None in [start_ghz, stop_ghz, step_mhz]:
-                        raise ValueError(f"Missing range parameters: {range_config}")
-                    if not all(isinstance(x, (int, float)) for x in [start_ghz, stop_ghz, step_mhz]):
-                        raise ValueError(f"Invalid range parameter types: {range_config}")
-                    if start_ghz > stop_ghz:
-                        raise ValueError(f"Start frequency ({start_ghz} GHz) exceeds stop ({stop_ghz} GHz)")
-                    if step_mhz <= 0:
-                        raise ValueError(f"Invalid step size: {step_mhz} MHz")
-                    num_steps = int((stop_ghz - start_ghz) / (step_mhz / 1000.0)) + 1
-                    frequencies = np.linspace(start_ghz, stop_ghz, num_steps).tolist()
-                    logger.info(f"Generated {len(frequencies)} frequencies: {frequencies} GHz")
-                elif isinstance(freq_input, (list, float, int)):
-                    frequencies = freq_input if isinstance(freq_input, list) else [freq_input]
-                    logger.info(f"Using discrete frequencies: {frequencies} GHz")
-                else:
-                    raise ValueError(f"Invalid center_frequency_ghz format: {freq_input}")
-            except Exception as e:
-                logger.error(f"Failed to process frequency input: {e}", exc_info=True)
+                frequencies = _expand_freqs(test.get(freq_key))
+            except ValueError as e:
+                logger.error(f"Invalid {freq_key} for {kind} test: {e}")
                 continue
+            if frequencies.size == 0:
+                logger.error(f"No frequencies to run for {kind} test")
+                continue
+            logger.info("Running %s test at %d frequencies", kind, frequencies.size)
+            test_set = run_test(test, frequencies, test_set)
 
-            iterations = test.get("iterations", 5)
-            for freq in frequencies:
-                logger.info(f"Preparing STN test set {test_set} at {freq:.3f} GHz")
-                print(f"\n=== Test Set {test_set} (STN) ===")
-                print(f"STN Freq: {freq:.3f} GHz, Iterations: {iterations}")
-                try:
-                    if stn_instr is None:
-                        logger.debug("Initializing new STN instrument")
-                        stn_instr = STN(freq=freq * 1e9)
-                    else:
-                        logger.debug(f"Reusing STN instrument, setting freq to {freq * 1e9:.3f} Hz")
-                        stn_instr.STN_set_frequency(freq * 1e9)
-                    run_stn_measurement(stn_instr, freq * 1e9, test_set, iterations=iterations)
-                    test_set += 1
-                except Exception as e:
-                    logger.error(f"STN test set {test_set} failed: {e}", exc_info=True)
-                    test_set += 1
-                finally:
-                    if stn_instr:
-                        try:
-                            stn_instr.close_connections()
-                        except Exception as e:
-                            logger.error(f"Error closing STN connections: {e}")
-                        stn_instr = None
-
-    # Save results to JSON
+    try:
+        bench().close_all()  # Close connections left open in the shared pool
+    except Exception as e:
+        logger.error(f"Error closing instrument connections: {e}")
+
+    # Save results to JSON from the streamed NDJSON log
+    _writer.close()
     results_path = os.path.join(os.path.dirname(__file__), 'results_output.json')
     try:
-        with open(results_path, 'w') as outfile:
-            json.dump(results, outfile, indent=2)
+        _writer.export_json(results_path)
         logger.info(f"Saved results to: {results_path}")
     except Exception as e:
         logger.error(f"Error saving JSON results: {e}", exc_info=True)
+    results = _writer.read()
 
-    # Create DataFrame for Test Data
-    df_rows = []
+    # Create DataFrame for Test Data, assembled column-wise
+    cols = {c: [] for c in _DF_COLUMNS}
     for r in results:
+        center_hz = r.center_frequency_hz if r.center_frequency_hz is not None else r.fundamental_frequency_hz
         base_row = {
-            "Test Set": r["test_set"],
-            "Type": r["type"],
-            "Center Frequency (GHz)": r.get("center_frequency_hz", r.get("fundamental_frequency_hz", None)) / 1e9,
-            "Power (dBm)": r.get("power_dbm"),
-            "Resource Blocks": r.get("resource_blocks"),
-            "Resource Block Offset": r.get("resource_block_offset"),
-            "Channel Bandwidth (MHz)": r.get("channel_bandwidth_mhz"),
-            "Modulation Type": r.get("modulation_type"),
-            "Subcarrier Spacing (kHz)": r.get("subcarrier_spacing_khz"),
-            "Duplexing": r.get("duplexing"),
-            "Link Direction": r.get("link_direction"),
-            "Waveform File": r.get("waveform_file"),
-            "Setup File": r.get("setup_file"),
-            "EVM (dB)": r.get("evm"),
-            "VSA_get_EVM Time (s)": r["timings"].get("VSA_get_EVM", 0),
-            "Channel Power (dBm)": r.get("ch_pwr"),
-            "ACP Lower (dB)": r.get("acp_lower"),
-            "ACP Upper (dB)": r.get("acp_upper"),
-            "Alternate Lower (dB)": r.get("alt_lower"),
-            "Alternate Upper (dB)": r.get("alt_upper"),
-            "VSA_get_ACLR Time (s)": r["timings"].get("VSA_get_ACLR", 0),
-            "RBW (MHz)": r.get("rbw_hz", None) / 1e6 if r.get("rbw_hz") else None,
-            "Spur Limit (dBm)": r.get("spur_limit_dbm"),
-            "Spur Frequency (MHz)": None,
-            "Spur Power (dBm)": None,
-            "Spur Measurement Time (s)": r["timings"].get("measure", 0),
-            "Get Results Time (s)": r["timings"].get("get_results", 0),
-            "Iteration": None,
-            "Marker (dBm)": None,
-            "Marker Time (s)": None,
-            "Stats Avg (dBm)": None,
-            "Total Test Time (s)": None,
-            "Config Summary": r.get("config"),
-            "VSG_Config Time (s)": r["timings"].get("VSG_Config", r["timings"].get("VSG_config", 0)),
-            "VSA_Config Time (s)": r["timings"].get("VSA_Config", r["timings"].get("VSA_config", 0)),
-            "VSA_get_info Time (s)": r["timings"].get("VSA_get_info", 0),
-            "Error": r.get("error")
+            "Test Set": r.test_set,
+            "Type": r.type,
+            "Center Frequency (GHz)": center_hz / 1e9 if center_hz is not None else None,
+            "Power (dBm)": r.power_dbm,
+            "Resource Blocks": r.resource_blocks,
+            "Resource Block Offset": r.resource_block_offset,
+            "Channel Bandwidth (MHz)": r.channel_bandwidth_mhz,
+            "Modulation Type": r.modulation_type,
+            "Subcarrier Spacing (kHz)": r.subcarrier_spacing_khz,
+            "Duplexing": r.duplexing,
+            "Link Direction": r.link_direction,
+            "Waveform File": r.waveform_file,
+            "Setup File": r.setup_file,
+            "EVM (dB)": r.evm,
+            "VSA_get_EVM Time (s)": r.timings.get("VSA_get_EVM", 0),
+            "Channel Power (dBm)": r.ch_pwr,
+            "ACP Lower (dB)": r.acp_lower,
+            "ACP Upper (dB)": r.acp_upper,
+            "Alternate Lower (dB)": r.alt_lower,
+            "Alternate Upper (dB)": r.alt_upper,
+            "VSA_get_ACLR Time (s)": r.timings.get("VSA_get_ACLR", 0),
+            "RBW (MHz)": r.rbw_hz / 1e6 if r.rbw_hz else None,
+            "Spur Limit (dBm)": r.spur_limit_dbm,
+            "Spur Measurement Time (s)": r.timings.get("measure", 0),
+            "Get Results Time (s)": r.timings.get("get_results", 0),
+            "Config Summary": r.config,
+            "VSG_Config Time (s)": r.timings.get("VSG_Config", 0),
+            "VSA_Config Time (s)": r.timings.get("VSA_Config", 0),
+            "VSA_get_info Time (s)": r.timings.get("VSA_get_info", 0),
+            "Error": r.error
         }
-        if r["type"] == "SpurSearch" and r.get("spurs"):
-            for spur in r["spurs"]:
-                spur_row = base_row.copy()
-                spur_row["Spur Frequency (MHz)"] = spur["frequency_hz"] / 1e6
-                spur_row["Spur Power (dBm)"] = spur["power_dbm"]
-                spur_row["Total Test Time (s)"] = sum(
-                    t for k, t in r["timings"].items()
-                    if k not in ["VSG_Config", "VSA_Config", "VSG_config", "VSA_config"]
-                )
-                df_rows.append(spur_row)
-        elif r["type"] == "STN" and r.get("markers"):
+        run_time = sum(t for k, t in r.timings.items() if k not in _SETUP_TIMING_KEYS)
+        if r.type == "SpurSearch" and r.spurs:
+            base_row["Total Test Time (s)"] = run_time
+            _extend_rows(cols, base_row, len(r.spurs), {
+                "Spur Frequency (MHz)": [spur["frequency_hz"] / 1e6 for spur in r.spurs],
+                "Spur Power (dBm)": [spur["power_dbm"] for spur in r.spurs]
+            })
+        elif r.type == "STN" and r.markers:
             stats_dict = {}
-            if r.get("stats"):
-                matches = re.findall(r"(Min|Max|Avg|StdDev|Delta):([-+]?\d+\.\d+)", r["stats"])
+            if r.stats:
+                matches = _STN_STATS_RE.findall(r.stats)
                 for key, value in matches:
                     stats_dict[key] = float(value)
-            total_test_time = r.get("total_test_time", sum(m["meas_time"] for m in r["markers"] if m["meas_time"] is not None))
-            total_test_time += r["timings"].get("VSA_Config", 0)
-            for i, marker in enumerate(r["markers"], 1):
-                stn_row = base_row.copy()
-                stn_row["Iteration"] = i
-                stn_row["Marker (dBm)"] = marker["marker"]
-                stn_row["Marker Time (s)"] = marker["meas_time"]
-                stn_row["Stats Avg (dBm)"] = stats_dict.get("Avg")
-                stn_row["Total Test Time (s)"] = total_test_time
-                df_rows.append(stn_row)
+            total_test_time = r.total_test_time if r.total_test_time is not None else sum(
+                m["meas_time"] for m in r.markers if m["meas_time"] is not None)
+            total_test_time += r.timings.get("VSA_Config", 0)
+            base_row["Stats Avg (dBm)"] = stats_dict.get("Avg")
+            base_row["Total Test Time (s)"] = total_test_time
+            _extend_rows(cols, base_row, len(r.markers), {
+                "Iteration": range(1, len(r.markers) + 1),
+                "Marker (dBm)": [marker["marker"] for marker in r.markers],
+                "Marker Time (s)": [marker["meas_time"] for marker in r.markers]
+            })
         else:
-            base_row["Total Test Time (s)"] = sum(
-                t for k, t in r["timings"].items()
-                if k not in ["VSG_Config", "VSA_Config", "VSG_config", "VSA_config"]
-            )
-            df_rows.append(base_row)
-
-    df = pd.DataFrame(df_rows)
-
-    # Ensure numeric columns are floats
-    for col in ["Center Frequency (GHz)", "Power (dBm)", "EVM (dB)", "Channel Power (dBm)",
-                "ACP Lower (dB)", "ACP Upper (dB)", "Alternate Lower (dB)", "Alternate Upper (dB)",
-                "VSA_get_EVM Time (s)", "VSA_get_ACLR Time (s)", "Total Test Time (s)",
-                "VSG_Config Time (s)", "VSA_Config Time (s)", "VSA_get_info Time (s)",
-                "RBW (MHz)", "Spur Limit (dBm)", "Spur Frequency (MHz)", "Spur Power (dBm)",
-                "Spur Measurement Time (s)", "Get Results Time (s)", "Marker (dBm)", "Marker Time (s)",
-                "Stats Avg (dBm)"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    # Format numeric columns
-    for col in ["Center Frequency (GHz)", "Power (dBm)", "EVM (dB)", "Channel Power (dBm)",
-                "ACP Lower (dB)", "ACP Upper (dB)", "Alternate Lower (dB)", "Alternate Upper (dB)",
-                "VSA_get_EVM Time (s)", "VSA_get_ACLR Time (s)", "Total Test Time (s)",
-                "VSG_Config Time (s)", "VSA_Config Time (s)", "VSA_get_info Time (s)",
-                "RBW (MHz)", "Spur Limit (dBm)", "Spur Frequency (MHz)", "Spur Power (dBm)",
-                "Spur Measurement Time (s)", "Get Results Time (s)", "Marker (dBm)", "Marker Time (s)",
-                "Stats Avg (dBm)"]:
-        if col in df.columns:
-            df[col] = df[col].map(lambda x: f"{x:.3f}" if pd.notna(x) else "", na_action='ignore')
+            base_row["Total Test Time (s)"] = run_time
+            _append_row(cols, base_row)
+
+    # Hand numeric columns to pandas as float64 arrays; None becomes NaN
+    for col in _NUMERIC_COLUMNS:
+        cols[col] = np.array(cols[col], dtype=np.float64)
+    df = pd.DataFrame(cols, copy=False)
 
     # Create Test Statistics DataFrame
-    test_times = [r["total_test_time"] for r in results if r["type"] == "STN" and r.get("total_test_time") is not None]
-    setup_times = [
-        r["timings"].get("VSG_Config", r["timings"].get("VSG_config", 0)) +
-        r["timings"].get("VSA_Config", r["timings"].get("VSA_config", 0))
-        for r in results
-    ]
-    evm_times = [r["timings"].get("VSA_get_EVM", 0) for r in results]
-    aclr_times = [r["timings"].get("VSA_get_ACLR", 0) for r in results]
-    info_times = [r["timings"].get("VSA_get_info", 0) for r in results]
-    spur_measure_times = [r["timings"].get("measure", 0) for r in results]
-    spur_results_times = [r["timings"].get("get_results", 0) for r in results]
-    marker_times = [m["meas_time"] for r in results if r["type"] == "STN" for m in r.get("markers", []) if m["meas_time"] is not None]
+    test_times, setup_times, evm_times, aclr_times = [], [], [], []
+    info_times, spur_measure_times, spur_results_times = [], [], []
+    for r in results:
+        t = r.timings
+        setup_times.append(t.get("VSG_Config", 0) + t.get("VSA_Config", 0))
+        evm_times.append(t.get("VSA_get_EVM", 0))
+        aclr_times.append(t.get("VSA_get_ACLR", 0))
+        info_times.append(t.get("VSA_get_info", 0))
+        spur_measure_times.append(t.get("measure", 0))
+        spur_results_times.append(t.get("get_results", 0))
+        if r.type == "STN" and r.total_test_time is not None:
+            test_times.append(r.total_test_time)
+    # Marker times go straight into a float64 array without an intermediate list
+    marker_times = np.fromiter(
+        (m["meas_time"] for r in results if r.type == "STN" for m in r.markers or () if m["meas_time"] is not None),
+        dtype=np.float64
+    )
     stats_data = {
         "Metric": [
             "Number of Tests",
@@ -720,42 +816,38 @@ if __name__ == '__main__':
             "Average Marker Time (s)",
             "Median Marker Time (s)"
         ],
-        "Value": [
-            len(results),
-            sum(test_times),
-            statistics.mean(test_times) if test_times else 0,
-            statistics.median(test_times) if test_times else 0,
-            sum(setup_times),
-            statistics.mean(setup_times) if setup_times else 0,
-            statistics.median(setup_times) if setup_times else 0,
-            sum(evm_times),
-            statistics.mean(evm_times) if evm_times else 0,
-            statistics.median(evm_times) if evm_times else 0,
-            sum(aclr_times),
-            statistics.mean(aclr_times) if aclr_times else 0,
-            statistics.median(aclr_times) if aclr_times else 0,
-            sum(info_times),
-            statistics.mean(info_times) if info_times else 0,
-            statistics.median(info_times) if info_times else 0,
-            sum(spur_measure_times),
-            statistics.mean(spur_measure_times) if spur_measure_times else 0,
-            statistics.median(spur_measure_times) if spur_measure_times else 0,
-            sum(spur_results_times),
-            statistics.mean(spur_results_times) if spur_results_times else 0,
-            statistics.median(spur_results_times) if spur_results_times else 0,
-            sum(marker_times),
-            statistics.mean(marker_times) if marker_times and any(marker_times) else 0,
-            statistics.median(marker_times) if marker_times and any(marker_times) else 0
-        ]
+        "Value": None
     }
+    timing_stats = np.array([
+        *_stats(test_times),
+        *_stats(setup_times),
+        *_stats(evm_times),
+        *_stats(aclr_times),
+        *_stats(info_times),
+        *_stats(spur_measure_times),
+        *_stats(spur_results_times),
+        *_stats(marker_times)
+    ])
+    # Values stay numeric: the count as an int, the timing statistics as floats rounded on output
+    stats_data["Value"] = [len(results), *timing_stats.tolist()]
     stats_df = pd.DataFrame(stats_data)
-    stats_df["Value"] = stats_df["Value"].map(lambda x: f"{x:.3f}" if isinstance(x, float) else x)
 
     excel_path = os.path.join(os.path.dirname(__file__), 'results_output.xlsx')
     try:
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Test Data', index=False)
-            stats_df.to_excel(writer, sheet_name='Test Statistics', index=False)
+        with pd.ExcelWriter(excel_path, engine=_EXCEL_ENGINE) as writer:
+            # Numeric columns stay float64; the writer rounds them to 3 decimals on output
+            df.to_excel(writer, sheet_name='Test Data', index=False, float_format="%.3f")
+            stats_df.to_excel(writer, sheet_name='Test Statistics', index=False, float_format="%.3f")
+            if _EXCEL_ENGINE == 'xlsxwriter':
+                # Show the numeric columns with 3 decimals in Excel as well
+                num_format = writer.book.add_format({'num_format': '0.000'})
+                sheet = writer.sheets['Test Data']
+                for idx in _NUMERIC_COLUMN_INDEXES:
+                    sheet.set_column(idx, idx, None, num_format)
+                stats_sheet = writer.sheets['Test Statistics']
+                stats_sheet.set_column(1, 1, None, num_format)
+                # The test count is the one whole number in the Value column
+                stats_sheet.write_number(1, 1, len(results), writer.book.add_format({'num_format': '0'}))
         logger.info(f"Successfully saved to: {excel_path}")
     except Exception as e:
         logger.error(f"Error saving Excel results: {e}", exc_info=True)
\ No newline at end of file
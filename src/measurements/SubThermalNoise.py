@@ -14,16 +14,32 @@ logger = logging.getLogger(__name__)
 class option_functions:
     """Class for Sub-Thermal Noise (STN) measurements."""
 
+    _vsa_instance = None  # Class variable for VSA connection
+    _vsg_instance = None  # Class variable for VSG connection
+
+    @classmethod
+    def ensure_connected(cls):
+        """Return the shared VSA/VSG connections from the bench pool.
+
+        The pool checks each connection under its lock and replaces one that
+        was closed elsewhere (e.g. by another driver's close_connections).
+
+        Returns:
+            tuple: (VSA, VSG) iSocket connections.
+        """
+        instruments = bench()
+        cls._vsa_instance = instruments.VSA_start()  # Start VSA connection
+        cls._vsg_instance = instruments.VSG_start()  # Start VSG connection
+        return cls._vsa_instance, cls._vsg_instance
+
     def __init__(self, freq=6e9):
         """Initialize STN driver and connections.
 
         Args:
             freq (float): Center frequency in Hz, default 6e9.
         """
-        logger.info(f"Initializing STN driver with freq={freq / 1e9:.3f}GHz")
-        self.VSA = bench().VSA_start()  # Start VSA connection
-        self.VSA.sock.settimeout(30)  # Set timeout
-        self.VSG = bench().VSG_start()  # Start VSG connection
+        logger.info("Initializing STN driver with freq=%.3fGHz", freq / 1e9)
+        self.VSA, self.VSG = option_functions.ensure_connected()
         self.VSG.write("OUTP:STAT OFF")  # Turn off VSG output
         self.frequency = freq
         self.swp_time = 1.0
@@ -34,21 +50,24 @@ class option_functions:
         logger.info("Configuring VSA for STN")
         self.VSA.query('*RST;*OPC?')  # Reset VSA
         self.VSA.query(':INST:SEL "Spectrum";*OPC?')  # Select spectrum mode
-        self.VSA.write(f':SENS:FREQ:CENT {self.frequency}')  # Set center frequency
-        self.VSA.write(':SENS:FREQ:SPAN 1e9')  # Set span to 1 GHz
-        self.VSA.write(':INP:GAIN:STAT ON')  # Enable input gain
-        self.VSA.write(':INP:GAIN:VAL 30')  # Set gain to 30 dB
-        self.VSA.write(':INP:ATT:AUTO OFF')  # Disable auto attenuation
-        self.VSA.write(':INP:ATT 0')  # Set attenuation to 0 dB
-        self.VSA.write(f':SENS:SWE:WIND:POIN {2001}')  # Set sweep points to 2001
-        self.VSA.write('DISP:WIND1:SUBW:TRAC1:MODE WRIT')  # Set trace mode to clear write
-        self.VSA.write(':SENS:WIND1:DET:FUNC RMS')  # Set RMS detector
-        self.VSA.write(f'SENS:BAND:RES {10e3}')  # Set resolution bandwidth to 10 kHz
-        self.VSA.write(f'SENS:BAND:VID {10e3}')  # Set video bandwidth to 10 kHz
-        self.VSA.write('SENS:SWE:TIME:AUTO OFF')  # Enable auto sweep time
-        self.VSA.write(f'SENS:SWE:TIME {0.005}')
-        self.VSA.write('SENS:SWE:TYPE AUTO')  # Enable auto sweep type
-        self.VSA.write(':SENS:SWE:OPT AUTO')  # Enable auto sweep optimization
+        # Sent as one message; every header is rooted with ':' so chaining keeps it absolute
+        self.VSA.write_many((
+            f':SENS:FREQ:CENT {self.frequency}',  # Set center frequency
+            ':SENS:FREQ:SPAN 1e9',  # Set span to 1 GHz
+            ':INP:GAIN:STAT ON',  # Enable input gain
+            ':INP:GAIN:VAL 30',  # Set gain to 30 dB
+            ':INP:ATT:AUTO OFF',  # Disable auto attenuation
+            ':INP:ATT 0',  # Set attenuation to 0 dB
+            f':SENS:SWE:WIND:POIN {2001}',  # Set sweep points to 2001
+            ':DISP:WIND1:SUBW:TRAC1:MODE WRIT',  # Set trace mode to clear write
+            ':SENS:WIND1:DET:FUNC RMS',  # Set RMS detector
+            f':SENS:BAND:RES {10e3}',  # Set resolution bandwidth to 10 kHz
+            f':SENS:BAND:VID {10e3}',  # Set video bandwidth to 10 kHz
+            ':SENS:SWE:TIME:AUTO OFF',  # Enable auto sweep time
+            f':SENS:SWE:TIME {0.005}',
+            ':SENS:SWE:TYPE AUTO',  # Enable auto sweep type
+            ':SENS:SWE:OPT AUTO',  # Enable auto sweep optimization
+        ))
         self.VSA.query('DISP:WIND1:SUBW:TRAC1:Y:SCAL:AUTO ONCE;*OPC?')  # Auto-scale display
         self.VSA.write('SENS:POW:NCOR ON')  # Enable noise correction
         self.VSA.query('INIT:IMM;*OPC?')  # Initiate sweep
@@ -59,9 +78,11 @@ class option_functions:
     def STN_Noise_Marker(self):
         """Configure noise marker for STN measurement."""
         logger.info("Configuring noise marker for STN")
-        self.VSA.write(':CALC1:DELT1:FUNC:PNO:STAT OFF')  # Disable power noise function
-        self.VSA.write(':CALC1:MARK1:FUNC:NOIS:STAT ON')  # Enable noise marker
-        self.VSA.write(f':CALC1:MARK1:X {self.frequency}')  # Set marker frequency
+        self.VSA.write_many((
+            ':CALC1:DELT1:FUNC:PNO:STAT OFF',  # Disable power noise function
+            ':CALC1:MARK1:FUNC:NOIS:STAT ON',  # Enable noise marker
+            f':CALC1:MARK1:X {self.frequency}',  # Set marker frequency
+        ))
 
     @method_timer
     def get_VSA_sweep_noise_mkr(self):
@@ -74,7 +95,7 @@ class option_functions:
         self.VSA.write('INIT:CONT OFF')  # Disable continuous sweep
         self.VSA.query('INIT:IMM;*OPC?')  # Initiate sweep and wait
         marker = self.VSA.queryFloat(':CALC:MARK:FUNC:NOIS:RES?')  # Fetch noise marker
-        logger.info(f"Noise marker measured: {marker:.2f} dBm")
+        logger.info("Noise marker measured: %.2f dBm", marker)
         return marker  # Decorator returns (marker, delta_time)
 
     def STN_set_frequency(self, freq):
@@ -83,11 +104,12 @@ class option_functions:
         Args:
             freq (float): Frequency in Hz.
         """
-        logger.info(f"Setting STN frequency to {freq / 1e9:.3f}GHz")
+        logger.info("Setting STN frequency to %.3fGHz", freq / 1e9)
         self.frequency = freq
-        self.VSA.write(f':SENS:FREQ:CENT {self.frequency}')  # Set center frequency
-        self.VSA.write(f':CALC1:MARK1:X {self.frequency}')  # Set marker frequency
-        self.VSA.query('*OPC?')  # Wait for operation complete
+        self.VSA.write_sync_many((
+            f':SENS:FREQ:CENT {self.frequency}',  # Set center frequency
+            f':CALC1:MARK1:X {self.frequency}',  # Set marker frequency
+        ))  # Wait for operation complete
 
     @staticmethod
     def get_Array_stats(in_arry):
@@ -100,13 +122,14 @@ class option_functions:
             str: Formatted string of statistics.
         """
         logger.info("Calculating STN array stats")
-        avg = np.mean(in_arry)
-        min_val = np.min(in_arry)
-        max_val = np.max(in_arry)
-        std_dev = np.std(in_arry)
+        arr = np.asarray(in_arry, dtype=np.float64)
+        min_val = arr.min()
+        max_val = arr.max()
+        avg = arr.mean()
+        std_dev = np.std(arr)  # Population std (ddof=0)
         out_str = (f'Min:{min_val:.3f} Max:{max_val:.3f} Avg:{avg:.3f} '
                    f'StdDev:{std_dev:.3f} Delta:{max_val - min_val:.3f}')
-        logger.info(f"STN stats: {out_str}")
+        logger.info("STN stats: %s", out_str)
         return out_str
 
     @method_timer
@@ -115,4 +138,6 @@ class option_functions:
         logger.info("Closing VSA and VSG connections")
         self.VSA.close()
         self.VSG.close()
+        option_functions._vsa_instance = None
+        option_functions._vsg_instance = None
         logger.info("Connections closed successfully")
\ No newline at end of file
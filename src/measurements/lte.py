@@ -7,7 +7,7 @@
 import logging
 import os
 import re
-from src.utils.utils import method_timer
+from src.utils.utils import method_timer, WaveformSnapshot
 from src.instruments.bench import bench
 
 logger = logging.getLogger(__name__)
@@ -27,8 +27,8 @@ class std_insr_driver:
             waveform_file (str, optional): Path to waveform file.
             setup_file (str, optional): Path to FSW setup file.
         """
-        logger.info(f"Initializing LTE driver with freq={freq / 1e9:.3f}GHz, pwr={pwr}dBm, "
-                    f"waveform_file={waveform_file}, setup_file={setup_file}")
+        logger.info("Initializing LTE driver with freq=%.3fGHz, pwr=%sdBm, waveform_file=%s, setup_file=%s",
+                    freq / 1e9, pwr, waveform_file, setup_file)
         self._validate_file_names(waveform_file, setup_file)
         self.waveform_params = self._extract_waveform_params(waveform_file) if waveform_file else {}
         self.rb = self.waveform_params.get("resource_blocks", 100)
@@ -40,10 +40,9 @@ class std_insr_driver:
         if std_insr_driver._vsa_instance is None:
             try:
                 std_insr_driver._vsa_instance = bench().VSA_start()
-                std_insr_driver._vsa_instance.sock.settimeout(30)
                 response = std_insr_driver._vsa_instance.query('*IDN?')
                 logger.info("Created new VSA connection")
-                logger.info(f"VSA IDN: {response}")
+                logger.info("VSA IDN: %s", response)
             except Exception as e:
                 logger.error(f"Failed to create VSA connection: {e}")
                 raise
@@ -52,7 +51,7 @@ class std_insr_driver:
                 std_insr_driver._vsg_instance = bench().VSG_start()
                 response = std_insr_driver._vsg_instance.query('*IDN?')
                 logger.info("Created new VSG connection")
-                logger.info(f"VSG IDN: {response}")
+                logger.info("VSG IDN: %s", response)
             except Exception as e:
                 logger.error(f"Failed to create VSG connection: {e}")
                 raise
@@ -63,6 +62,11 @@ class std_insr_driver:
         self.waveform_file = waveform_file
         self.setup_file = setup_file
         self.swp_time = 0.01
+        # File names are fixed for the driver's lifetime; derive their SCPI forms once
+        self._scpi_waveform_path = waveform_file.replace('\\', '/') if waveform_file else None
+        self._scpi_setup_path = setup_file.replace('\\', '/') if setup_file else None
+        self._info_suffix_key = None  # Inputs the cached _info_suffix was built from
+        self._info_suffix_cache = None
 
     def _validate_file_names(self, waveform_file, setup_file):
         """Validate waveform and setup file names against required format."""
@@ -71,7 +75,7 @@ class std_insr_driver:
         for file_path, file_type, pattern in [(waveform_file, "waveform", waveform_pattern), (setup_file, "setup", setup_pattern)]:
             if file_path:
                 file_name = os.path.basename(file_path).strip()
-                logger.debug(f"Validating {file_type} file name: '{file_name}'")
+                logger.debug("Validating %s file name: '%s'", file_type, file_name)
                 if not re.match(pattern, file_name):
                     logger.error(f"Invalid {file_type} file name: {file_name}")
                     raise ValueError(f"Invalid {file_type} file name: {file_name}")
@@ -79,7 +83,7 @@ class std_insr_driver:
     def _extract_waveform_params(self, waveform_file):
         """Extract parameters from waveform file name."""
         file_name = os.path.basename(waveform_file).strip()
-        logger.debug(f"Extracting parameters from waveform file: '{file_name}'")
+        logger.debug("Extracting parameters from waveform file: '%s'", file_name)
         pattern = r'^LTE_(UL|DL)_(\d+MHz)_(QPSK|16QAM|64QAM|256QAM|1024QAM)_15kHz_(\d+RB)_(\d+RBO)\.wv$'
         match = re.match(pattern, file_name)
         if not match:
@@ -101,6 +105,30 @@ class std_insr_driver:
             logger.error(f"Error parsing waveform parameters from {file_name}: {e}")
             return {}
 
+    def _build_info_suffix(self):
+        """Return the frequency-independent part of the VSA_get_info config string."""
+        scs = 15 if self.waveform_params else "15kHz"  # Matches the historical config strings
+        parts = [f"{self.bw}MHz", self.dupl, self.ldir, str(scs), f"{self.rb}RB", f"{self.rbo}RBO", self.mod]
+        if self.waveform_file:
+            parts += ("waveform", os.path.basename(self.waveform_file))
+        if self.setup_file:
+            parts += ("setup", os.path.basename(self.setup_file))
+        return "_".join(parts)
+
+    @property
+    def _info_suffix(self):
+        """Frequency-independent part of the config string, rebuilt when its inputs change."""
+        key = (self.bw, self.dupl, self.ldir, bool(self.waveform_params), self.rb, self.rbo, self.mod,
+               self.waveform_file, self.setup_file)
+        if key != self._info_suffix_key:
+            self._info_suffix_cache = self._build_info_suffix()
+            self._info_suffix_key = key
+        return self._info_suffix_cache
+
+    def snapshot(self):
+        """Return the current waveform parameters as a WaveformSnapshot."""
+        return WaveformSnapshot(self.bw, 15, self.rb, self.rbo, self.mod, self.dupl, self.ldir)  # LTE SCS is fixed
+
     @classmethod
     def close_connections(cls):
         """Close VSA and VSG connections."""
@@ -120,13 +148,12 @@ class std_insr_driver:
             if not self.waveform_file:
                 logger.error("No waveform file provided")
                 raise ValueError("No waveform file provided")
-            scpi_waveform_path = self.waveform_file.replace('\\', '/')
-            logger.info(f"Loading waveform file: {scpi_waveform_path}")
+            scpi_waveform_path = self._scpi_waveform_path
+            logger.info("Loading waveform file: %s", scpi_waveform_path)
             self.VSG.write(':SOUR1:BB:ARB:STAT 0')
             self.VSG.query(f':SOUR1:BB:ARB:WAV:SEL "{scpi_waveform_path}";*OPC?')
             self.VSG.query(':SOUR1:BB:ARB:STAT 1;*OPC?')
-            self.VSG.write(f':SOUR1:FREQ:CW {self.freq}')
-            self.VSG.write(':OUTP1:STAT 1')
+            self.VSG.write_many((f':SOUR1:FREQ:CW {self.freq}', ':OUTP1:STAT 1'))
             self.VSG.query(':SOUR1:CORR:OPT:EVM 1;*OPC?')
             self.VSG.write(':SOUR1:BB:ARB:TRIG:OUTP1:MODE REST')
             self.VSG_pwr(self.pwr)
@@ -156,8 +183,8 @@ class std_insr_driver:
             if not self.setup_file:
                 logger.error("No setup file provided")
                 raise ValueError("No setup file provided")
-            scpi_setup_path = self.setup_file.replace('\\', '/')
-            logger.info(f"Recalling setup file: {scpi_setup_path}")
+            scpi_setup_path = self._scpi_setup_path
+            logger.info("Recalling setup file: %s", scpi_setup_path)
             self.VSA.query('*RST;*OPC?')
             self.VSA.query(f':MMEM:LOAD:STAT 1,"{scpi_setup_path}";*OPC?')
             self.VSA.query(':SENS:ADJ:LEV;*OPC?')
@@ -174,7 +201,7 @@ class std_insr_driver:
     @method_timer
     def VSx_freq(self, freq):
         """Set frequency for both VSA and VSG."""
-        logger.info(f"Setting VSA/VSG frequency to {freq / 1e9:.3f}GHz")
+        logger.info("Setting VSA/VSG frequency to %.3fGHz", freq / 1e9)
         if not isinstance(freq, (int, float)) or freq <= 0:
             logger.error(f"Invalid frequency: {freq}")
             raise ValueError(f"Invalid frequency: {freq}")
@@ -196,28 +223,8 @@ class std_insr_driver:
     @method_timer
     def VSA_get_info(self):
         """Get and return VSA configuration info."""
-        if self.waveform_params:
-            params = self.waveform_params
-            config = (f"{self.freq / 1e9:.3f}GHz_"
-                      f"{params['channel_bandwidth_mhz']}MHz_"
-                      f"{params['duplexing']}_"
-                      f"{params['link_direction']}_"
-                      f"{params['subcarrier_spacing_khz']}_"
-                      f"{params['resource_blocks']}RB_"
-                      f"{params['resource_block_offset']}RBO_"
-                      f"{params['modulation_type']}")
-            if self.waveform_file:
-                config += f"_waveform_{os.path.basename(self.waveform_file)}"
-            if self.setup_file:
-                config += f"_setup_{os.path.basename(self.setup_file)}"
-        else:
-            config = (f"{self.freq / 1e9:.3f}GHz_{self.bw}MHz_{self.dupl}_{self.ldir}_"
-                      f"15kHz_{self.rb}RB_{self.rbo}RBO_{self.mod}")
-            if self.waveform_file:
-                config += f"_waveform_{os.path.basename(self.waveform_file)}"
-            if self.setup_file:
-                config += f"_setup_{os.path.basename(self.setup_file)}"
-        logger.info(f"VSA configuration: {config}")
+        config = f"{self.freq / 1e9:.3f}GHz_{self._info_suffix}"
+        logger.info("VSA configuration: %s", config)
         return config
 
     @method_timer
@@ -231,23 +238,21 @@ class std_insr_driver:
         try:
             self.VSA.write(':CONF:LTE:MEAS EVM;*OPC')
             self.VSA.query('INIT:IMM;*OPC?')
-            pep_str = self.VSG.query(':SOUR1:POW:PEP?')
             try:
-                pep = float(pep_str)
-            except ValueError:
-                logger.error(f"Failed to parse PEP value: '{pep_str}'")
+                pep = self.VSG.queryFloat(':SOUR1:POW:PEP?')
+            except ValueError as e:
+                logger.error(f"Failed to parse PEP value: {e}")
                 raise
             reflev = pep - 2
             self.VSA.write(f':DISP:WIND:TRAC:Y:SCAL:RLEV {reflev}')
             self.VSA.query('INIT:IMM;*OPC?')
-            evm_str = self.VSA.query(':FETC:CC1:SUMM:EVM:ALL:AVER?')
             try:
-                evm = float(evm_str)
-                logger.info(f"EVM measured: {evm:.2f} dB")
-                return evm
-            except ValueError:
-                logger.error(f"Failed to parse EVM value: '{evm_str}'")
+                evm = self.VSA.queryFloat(':FETC:CC1:SUMM:EVM:ALL:AVER?')
+            except ValueError as e:
+                logger.error(f"Failed to parse EVM value: {e}")
                 return float('nan')
+            logger.info("EVM measured: %.2f dB", evm)
+            return evm
         except Exception as e:
             logger.error(f"EVM measurement failed: {e}")
             return float('nan')
@@ -257,14 +262,18 @@ class std_insr_driver:
         """Measure and return ACLR (Adjacent Channel Leakage Ratio)."""
         logger.info("Measuring ACLR")
         try:
-            self.VSA.write(':CONF:LTE:MEAS ACLR;*OPC')
-            self.VSA.write(f':SENS:FREQ:CENT {self.freq};:SENS:POW:ACH:ACP 2;*OPC')
-            self.VSA.write(':SENS:SWE:TYPE SWE')
-            self.VSA.write(f':SENS:SWE:OPT SPE')
+            self.VSA.write_many((
+                ':CONF:LTE:MEAS ACLR',
+                f':SENS:FREQ:CENT {self.freq}',
+                ':SENS:POW:ACH:ACP 2',
+                ':SENS:SWE:TYPE SWE',
+                ':SENS:SWE:OPT SPE',  # Set sweep optimization to speed
+                '*OPC',
+            ))
             self.VSA.query('INIT:IMM;*OPC?')
             aclr = self.VSA.query(':CALC:MARK:FUNC:POW:RES? ACP')
-            logger.info(f"ACLR measured: {aclr}")
-            return str(aclr).strip()
+            logger.info("ACLR measured: %s", aclr)
+            return aclr  # iSocket.query already returns a stripped str
         except Exception as e:
             logger.error(f"ACLR measurement failed: {e}")
             return ''
\ No newline at end of file
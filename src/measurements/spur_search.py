@@ -4,12 +4,67 @@
 # Description: This module handles spur search measurements using FSW-K50. It configures instruments,
 #              performs measurements, and retrieves results while filtering out the fundamental frequency.
 
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
 from src.utils.utils import method_timer
 from src.instruments.bench import bench
 
 logger = logging.getLogger(__name__)
 
+MEASURE_TIMEOUT = 60  # Seconds allowed for one spur search sweep
+ESR_ERROR_MASK = 0x3C  # *ESR? command, execution, device-dependent and query error bits
+
+# Fixed part of the FSW spur search setup, sent after the frequency span and
+# before the limits; every header is rooted with ':' so chaining keeps it absolute
+_VSA_STATIC_CMDS = (
+    ':DISP:WIND1:SUBW:TRAC1:MODE AVER',  # Set trace mode to average
+    ':SENS:AVER:COUN 5',
+    ':SENS:WIND1:DET1:FUNC RMS',  # Set RMS detector
+    ':SENS:LIST:RANG1:FILT:TYPE NORM',  # Normal filter 3dB
+    ':SENS:SWE:TIME:AUTO ON',  # Sweep Time Auto
+    ':SENS:SWE:TYPE FFT',  # Set sweep type to FFT
+    ':SENS:SWE:OPT SPE',  # Set sweep optimization to speed
+    ':DISP:WIND1:TRAC:Y:SCAL:RLEV -30',  # Set reference level to -30 dBm
+    ':SENS:INP:ATT:AUTO OFF',  # Auto attenuation OFF
+    ':INP:ATT 0',  # Set attenuation to 0 dB
+    ':INP:GAIN:STAT ON',  # Enable preamplifier
+    ':INP:GAIN:VAL 30',  # Set gain to 30 dB
+    ':SENS:POW:NCOR ON',  # Enable power noise correction
+    ':CALC1:MARK1:FUNC:FPE:STAT ON',
+)
+_VSA_STATIC_MESSAGE = ';'.join(_VSA_STATIC_CMDS)
+
+# Limit enables go last, once the search limits and threshold hold their new values
+_VSA_ENABLE_CMDS = (
+    ':CALC1:MARK1:X:SLIM:STAT ON',
+    ':CALC1:THR:STAT ON',
+)
+_VSA_ENABLE_MESSAGE = ';'.join(_VSA_ENABLE_CMDS)
+
+MIN_SWEEP_POINTS = 2001
+MAX_SWEEP_POINTS = 100001
+
+
+def _sweep_points(span_hz, rbw_hz):
+    """Return the sweep point count that keeps two points per RBW across the span.
+
+    Args:
+        span_hz (float): Swept span in Hz.
+        rbw_hz (float): Resolution bandwidth in Hz.
+
+    Returns:
+        int: Point count clamped to [MIN_SWEEP_POINTS, MAX_SWEEP_POINTS].
+    """
+    return min(MAX_SWEEP_POINTS, max(MIN_SWEEP_POINTS, int(span_hz / (rbw_hz / 2))))
+
+
+@functools.lru_cache(maxsize=256)
+def _fmt_freq(freq_hz):
+    """Return (Hz, GHz) strings for an integer frequency, reused across repeated setpoints."""
+    return f"{freq_hz}", f"{freq_hz / 1e9:.3f}"
+
 
 class SpurSearch:
     """Class for FSW-K50 spur measurements.
@@ -17,7 +72,10 @@ class SpurSearch:
     This class manages the setup, execution, and retrieval of spur search measurements.
     """
 
-    def __init__(self, fundamental_ghz, rbw_mhz=0.01, spur_limit_dbm=-95, pwr=0):
+    batch_commands = True  # Set False for transports that reject long compound messages or chained queries
+    binary_results = False  # Fetch FPE peak lists as binary blocks; pays off for long peak lists
+
+    def __init__(self, fundamental_ghz, rbw_mhz=0.01, spur_limit_dbm=-95, pwr=0, headless=True, exclusion_window_hz=10e6):
         """Initialize the SpurSearch class for FSW-K50 spur measurements.
 
         Args:
@@ -25,27 +83,51 @@ class SpurSearch:
             rbw_mhz (float, optional): Resolution bandwidth in MHz, default 0.01.
             spur_limit_dbm (float, optional): Spur limit in dBm, default -95.
             pwr (float, optional): VSG power in dBm, default 0.
+            headless (bool, optional): Skip front-panel-only display commands, default True.
+            exclusion_window_hz (float, optional): Half-width of the band around the
+                fundamental that is not reported as a spur, default 10 MHz.
         """
         self.fundamental_ghz = fundamental_ghz
         self.rbw_mhz = rbw_mhz
         self.spur_limit_dbm = spur_limit_dbm
         self.pwr = pwr
+        self.headless = headless
         self.frequency = fundamental_ghz * 1e9
-        self.VSA = bench().VSA_start()  # Start VSA connection
-        self.VSA.sock.settimeout(30)  # Set timeout
-        self.VSG = bench().VSG_start()  # Start VSG connection
-        self.VSG.sock.settimeout(30)  # Set timeout
-        logger.info(f"SpurSearch initialized: fundamental={fundamental_ghz} GHz, "
-                    f"RBW={rbw_mhz} MHz, spur_limit={spur_limit_dbm} dBm, VSG_power={pwr} dBm")
+        self._fundamental_hz = self.frequency
+        self._exclusion_window_hz = exclusion_window_hz
+        self._bench = bench()  # Connections come from the shared pool, so later points reuse them
+        self.VSA = self._bench.VSA_start()  # Start VSA connection
+        self.VSG = self._bench.VSG_start()  # Start VSG connection
+        self._pool = ThreadPoolExecutor(max_workers=2)  # One worker per instrument for overlapped setup
+        logger.info("SpurSearch initialized: fundamental=%s GHz, RBW=%s MHz, spur_limit=%s dBm, VSG_power=%s dBm",
+                    fundamental_ghz, rbw_mhz, spur_limit_dbm, pwr)
+
+    def _batch_write(self, inst, cmds):
+        """Send SCPI commands to an instrument and wait for them to complete.
+
+        Args:
+            inst (iSocket): Instrument connection to write to.
+            cmds (iterable of str): Rooted SCPI commands to send in order.
+
+        Returns:
+            str: *OPC? response.
+        """
+        if self.batch_commands:
+            return inst.write_sync_many(cmds)  # One ';'-chained message ending in *OPC?
+        for cmd in cmds:
+            inst.write(cmd)
+        return inst.query('*OPC?')
 
     @method_timer
-    def VSA_config(self, fundamental_ghz=None, rbw_mhz=None, spur_limit_dbm=None):
+    def VSA_config(self, fundamental_ghz=None, rbw_mhz=None, spur_limit_dbm=None, reset=True):
         """Configure the FSW for spur search measurement.
 
         Args:
             fundamental_ghz (float, optional): Override fundamental frequency in GHz.
             rbw_mhz (float, optional): Override resolution bandwidth in MHz.
             spur_limit_dbm (float, optional): Override spur limit in dBm.
+            reset (bool, optional): Lead the setup message with *RST; pass False
+                when the FSW is already set up from a previous point, default True.
         """
         try:
             # Use provided parameters or instance defaults
@@ -53,115 +135,208 @@ class SpurSearch:
             rbw_mhz = rbw_mhz if rbw_mhz is not None else self.rbw_mhz
             spur_limit_dbm = spur_limit_dbm if spur_limit_dbm is not None else self.spur_limit_dbm
 
-            self.VSA.query('*RST;*OPC?')  # Reset VSA
-            logger.info("FSW reset for spur search")
-
             # Define frequency ranges for spur search
             start_freq1 = (fundamental_ghz / 2) * 1e9
             stop_freq1 = fundamental_ghz * 1e9 - 1e6
             start_freq2 = fundamental_ghz * 1e9 + 1e6
             stop_freq2 = (2 * fundamental_ghz) * 1e9  #
 
-            self.VSA.write('INIT:CONT OFF')  # Disable continuous sweep
-            #  self.VSA.query('INIT:IMM;*OPC?')  # Initiate sweep and wait for completion
-
-            # Configure Range 1 Fo/2 --> Fo-1MHz
-            self.VSA.write(f"SENS:FREQ:STAR {start_freq1:.0f}")
-            self.VSA.write(f"SENS:FREQ:STOP {stop_freq1:.0f}")
-            self.VSA.write(':DISP:WIND1:SUBW:TRAC1:MODE AVER')  # Set trace mode to average
-            self.VSA.write(':SENS:AVER:COUN 5')
-            self.VSA.write(':SENS:WIND1:DET1:FUNC RMS')  # Set RMS detector
-            self.VSA.write(':SENS:LIST:RANG1:FILT:TYPE NORM')  # Normal filter 3dB
-            self.VSA.write(f':SENS:BAND:RES {rbw_mhz * 1e6}')
-            self.VSA.write(':SENS:SWE:TIME:AUTO ON')  # Sweep Time Auto
-            self.VSA.write('SENS:SWE:TYPE FFT')  # Set sweep type to auto
-            self.VSA.write('SENS:SWE:OPT SPE')  # Set sweep optimization to auto
-            self.VSA.write(f'SENS:SWE:WIND1:POIN {100001}')  # Set sweep points to 2001
-            self.VSA.write(f'DISP:WIND1:TRAC:Y:SCAL:RLEV {-30}')  # Set reference level to -40 dBm
-            self.VSA.write('SENS:INP:ATT:AUTO OFF')  # Auto attenuation OFF
-            self.VSA.write(f':INP:ATT {0}   ')  # Set attenuation to 0 dB
-            self.VSA.write('INP:GAIN:STAT ON')  # Sweep Time Auto
-            self.VSA.write('INP:GAIN:VAL 30')  # Set gain to 30 dB
-            self.VSA.write('SENS:POW:NCOR ON')  # Enable power noise correction
-            #  self.VSA.write(f'CALC1:DLIN1 {spur_limit_dbm}')
-            self.VSA.write('CALC1:MARK1:FUNC:FPE:STAT ON')
-            self.VSA.write(f'CALC1:MARK1:X:SLIM:LEFT {start_freq1}')  # Set left limit for spur detection
-            self.VSA.write(f'CALC1:MARK1:X:SLIM:RIGH {stop_freq2}')  # Set right limit for spur detection
-            self.VSA.write(f'CALC1:THR {spur_limit_dbm}')  # Set threshold for spur detection
-            self.VSA.write('CALC1:MARK1:X:SLIM:STAT ON')
-            self.VSA.write('CALC1:THR:STAT ON')
-            #  self.VSA.query('INIT:IMM;*OPC?')  # Initiate sweep and wait for completion
-            #  self.VSA.write('DISP:WIND1:SUBW:TRAC1:Y:SCAL:AUTO ONCE')  # Auto scale Y-axis
-            logger.info("Spur detection table configured")
-            logger.info(f"Range 1: {start_freq1 / 1e9:.3f}–{stop_freq1 / 1e9:.3f} GHz")
+            # Configure Range 1 Fo/2 --> Fo-1MHz; only the range, RBW, points and limit commands vary per call
+            static_cmds = (_VSA_STATIC_MESSAGE,) if self.batch_commands else _VSA_STATIC_CMDS
+            enable_cmds = (_VSA_ENABLE_MESSAGE,) if self.batch_commands else _VSA_ENABLE_CMDS
+            # *RST rides in the same message; the parser applies the setup after the reset completes
+            self._batch_write(self.VSA, (
+                *(('*RST',) if reset else ()),
+                ':INIT:CONT OFF',  # Disable continuous sweep
+                f":SENS:FREQ:STAR {start_freq1:.0f}",
+                f":SENS:FREQ:STOP {stop_freq1:.0f}",
+                *static_cmds,
+                f':SENS:BAND:RES {rbw_mhz * 1e6}',
+                f':SENS:SWE:WIND1:POIN {_sweep_points(stop_freq1 - start_freq1, rbw_mhz * 1e6)}',
+                f':CALC1:MARK1:X:SLIM:LEFT {start_freq1}',  # Set left limit for spur detection
+                f':CALC1:MARK1:X:SLIM:RIGH {stop_freq2}',  # Set right limit for spur detection
+                f':CALC1:THR {spur_limit_dbm}',  # Set threshold for spur detection
+                *enable_cmds,
+            ))
+            logger.info("Spur detection table configured%s", " after reset" if reset else "")
+            logger.info("Range 1: %.3f–%.3f GHz", start_freq1 / 1e9, stop_freq1 / 1e9)
 
         except Exception as e:
             logger.error(f"Failed to configure FSW: {e}")
             raise
 
     @method_timer
-    def VSG_config(self, frequency_ghz=None, pwr=None):
+    def VSG_config(self, frequency_ghz=None, pwr=None, reset=True):
         """Configure the VSG for spur search.
 
         Args:
             frequency_ghz (float, optional): Frequency in GHz.
             pwr (float, optional): Power in dBm.
+            reset (bool, optional): Lead the setup message with *RST; pass False
+                when the VSG is already set up from a previous point, default True.
         """
         try:
             frequency = (frequency_ghz * 1e9) if frequency_ghz is not None else self.frequency
             pwr = pwr if pwr is not None else self.pwr
 
-            self.VSG.query('*RST;*OPC?')  # Reset VSG
-            self.VSG.write(f"SOUR:FREQ:CW {frequency:.0f}")  # Set frequency
-            self.VSG.write(f"SOUR:POW:LEV:IMM:AMPL {pwr:.2f}")  # Set power
-
-            # Configure multi-carrier arbitrary waveform for testing
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier1:MODE ARB')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier1:COUNt 4')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier1:FREQuency -1000000000')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier2:FREQuency -500000000')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier3:FREQuency 600000000')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier4:FREQuency 1000000000')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier1:POWer -45')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier2:POWer -20')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier3:POWer -25')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier4:POWer -50')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier1:STATe 1')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier2:STATe 1')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier3:STATe 1')
-            self.VSG.write('SOURce1:BB:ARBitrary:MCARrier:CARRier4:STATe 1')
-            self.VSG.query('SOURce1:BB:ARBitrary:MCARrier:CLOad;*OPC?')
-            self.VSG.write('SOURce1:BB:ARBitrary:TRIGger:OUTPut1:MODE REST')
-            self.VSG.write('SOURce1:BB:ARBitrary:STATe 1')
-            self.VSG.write('OUTPut1:STATe 1')
-
-            logger.info(f"VSG set: frequency={frequency / 1e9:.3f} GHz, power={pwr:.2f} dBm")
+            self._batch_write(self.VSG, (
+                *(('*RST',) if reset else ()),
+                f":SOUR:FREQ:CW {frequency:.0f}",  # Set frequency
+                f":SOUR:POW:LEV:IMM:AMPL {pwr:.2f}",  # Set power
+                # Configure multi-carrier arbitrary waveform for testing
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier1:MODE ARB',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier1:COUNt 4',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier1:FREQuency -1000000000',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier2:FREQuency -500000000',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier3:FREQuency 600000000',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier4:FREQuency 1000000000',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier1:POWer -45',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier2:POWer -20',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier3:POWer -25',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier4:POWer -50',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier1:STATe 1',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier2:STATe 1',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier3:STATe 1',
+                ':SOURce1:BB:ARBitrary:MCARrier:CARRier4:STATe 1',
+                ':SOURce1:BB:ARBitrary:MCARrier:CLOad',  # Build and load the multi-carrier waveform
+                '*WAI',  # Waveform must be loaded before the ARB is switched on
+                ':SOURce1:BB:ARBitrary:TRIGger:OUTPut1:MODE REST',
+                ':SOURce1:BB:ARBitrary:STATe 1',
+                ':OUTPut1:STATe 1',
+            ))
+
+            logger.info("VSG set: frequency=%.3f GHz, power=%.2f dBm", frequency / 1e9, pwr)
         except Exception as e:
             logger.error(f"Failed to configure VSG: {e}")
             raise
 
+    def configure_all(self, fundamental_ghz=None, rbw_mhz=None, spur_limit_dbm=None, pwr=None, reset=True):
+        """Configure the VSG and FSW concurrently.
+
+        The two instruments sit on independent connections, so both setups run
+        on their own thread and overlap their network round trips. If either
+        setup fails, both are waited for, both pooled connections are evicted
+        and the first error is raised.
+
+        Args:
+            fundamental_ghz (float, optional): Override fundamental frequency in GHz.
+            rbw_mhz (float, optional): Override resolution bandwidth in MHz.
+            spur_limit_dbm (float, optional): Override spur limit in dBm.
+            pwr (float, optional): Override VSG power in dBm.
+            reset (bool, optional): Reset both instruments before configuring, default True.
+
+        Returns:
+            dict: Setup times in seconds keyed "VSG_Config" and "VSA_Config".
+        """
+        futures = {
+            "VSG_Config": self._pool.submit(self.VSG_config, frequency_ghz=fundamental_ghz, pwr=pwr, reset=reset),
+            "VSA_Config": self._pool.submit(self.VSA_config, fundamental_ghz=fundamental_ghz, rbw_mhz=rbw_mhz,
+                                            spur_limit_dbm=spur_limit_dbm, reset=reset),
+        }
+        wait(futures.values())  # Let both setups finish before acting on either result
+        errors = [(name, future.exception()) for name, future in futures.items() if future.exception()]
+        if errors:
+            for name, e in errors:
+                logger.error("%s failed during concurrent setup: %s", name, e)
+            # Either instrument may hold a half-applied setup or an unread reply, so
+            # the next point starts from fresh connections
+            self._bench._evict(self._bench.VSA_IP)
+            self._bench._evict(self._bench.VSG_IP)
+            self.VSA = None
+            self.VSG = None
+            raise errors[0][1]
+        return {name: future.result()[1] for name, future in futures.items()}
+
+    def setup(self, freq_ghz=None, reset=True):
+        """Retarget SpurSearch to a fundamental and configure both instruments.
+
+        Each instrument gets its whole setup, including the reset and its
+        frequency, as one compound message; the two messages are sent
+        concurrently by configure_all().
+
+        Args:
+            freq_ghz (float, optional): New fundamental frequency in GHz.
+            reset (bool, optional): Reset both instruments first, default True.
+
+        Returns:
+            dict: Setup times in seconds keyed "VSG_Config" and "VSA_Config".
+        """
+        if freq_ghz is not None:
+            self.fundamental_ghz = freq_ghz
+            self.frequency = freq_ghz * 1e9
+            self._fundamental_hz = self.frequency
+        return self.configure_all(fundamental_ghz=self.fundamental_ghz, reset=reset)
+
     @method_timer
     def VSx_freq(self, freq):
-        """Set frequency for both VSA and VSG.
+        """Set frequency for both VSA and VSG and wait until both have settled.
+
+        The two *OPC? round trips run on separate workers so they overlap.
 
         Args:
             freq (float): Frequency in Hz.
         """
-        logger.info(f"Setting VSA/VSG frequency to {freq / 1e9:.3f} GHz")
-        self.VSA.write(f"SENS:FREQ:CENT {freq:.0f}")
-        self.VSG.write(f"SOUR:FREQ:CW {freq:.0f}")
+        freq_str, freq_ghz_str = _fmt_freq(round(freq))
+        logger.info("Setting VSA/VSG frequency to %s GHz", freq_ghz_str)
+        futures = (
+            self._pool.submit(self.VSA.write_sync_many, (f":SENS:FREQ:CENT {freq_str}",)),
+            self._pool.submit(self.VSG.write_sync_many, (f":SOUR:FREQ:CW {freq_str}",)),
+        )
+        for future in futures:
+            future.result()
         self.frequency = freq
+        self._fundamental_hz = freq  # Keep spur filtering centred on the current carrier
 
     @method_timer
     def measure(self):
-        """Perform the spur search measurement."""
+        """Perform the spur search measurement.
+
+        The sweep is started and fenced with *WAI in one message; the trailing
+        *ESR? both confirms completion and reports any SCPI error bits.
+        """
+        previous_timeout = self.VSA.set_timeout(MEASURE_TIMEOUT)  # 100001-point sweeps can run long
         try:
-            self.VSA.write(':INIT:CONT OFF')  # Disable continuous sweep
-            self.VSA.query("INIT:IMM;*OPC?")  # Initiate sweep and wait
+            esr = int(self.VSA.query(':INIT:CONT OFF;:INIT:IMM;*WAI;*ESR?'))
+            if esr & ESR_ERROR_MASK:
+                logger.warning("FSW reported SCPI errors during spur search (ESR=%d)", esr)
             logger.info("Spur search measurement completed")
         except Exception as e:
             logger.error(f"Spur search measurement failed: {e}")
             raise
+        finally:
+            self.VSA.set_timeout(previous_timeout)
+
+    def _read_peak_lists(self):
+        """Read the FPE spur count and its frequency/amplitude lists.
+
+        Returns:
+            tuple: (spur_count, freqs, powers) with freqs in Hz and powers in dBm as float64 arrays.
+        """
+        if self.binary_results:
+            spur_count = int(self.VSA.query(':CALC:MARK:FUNC:FPE:COUN?'))
+            if spur_count == 0:
+                return 0, np.empty(0), np.empty(0)
+            # Little-endian REAL,64 blocks; REAL,32 would round GHz frequencies to ~1 kHz
+            try:
+                freqs = np.frombuffer(self.VSA.queryBinary(
+                    ':FORM:DATA REAL,64;:FORM:BORD SWAP;:CALC:MARK:FUNC:FPE:X?'), dtype='<f8')
+                powers = np.frombuffer(self.VSA.queryBinary(':CALC:MARK:FUNC:FPE:Y?'), dtype='<f8')
+            finally:
+                self.VSA.write(':FORM:DATA ASC')  # Restore ASCII for later queries on the shared connection
+            return spur_count, freqs, powers
+        if self.batch_commands:
+            # Spur count, frequencies and amplitudes in one round trip
+            count_response, freq_response, power_response = self.VSA.query(
+                ':CALC:MARK:FUNC:FPE:COUN?;:CALC:MARK:FUNC:FPE:X?;:CALC:MARK:FUNC:FPE:Y?').split(';', 2)
+        else:
+            count_response = self.VSA.query(':CALC:MARK:FUNC:FPE:COUN?')
+            freq_response = self.VSA.query(':CALC:MARK:FUNC:FPE:X?')
+            power_response = self.VSA.query(':CALC:MARK:FUNC:FPE:Y?')
+        spur_count = int(count_response.strip())
+        if spur_count == 0:
+            return 0, np.empty(0), np.empty(0)
+        # Parse the comma-separated responses directly into arrays
+        return spur_count, np.fromstring(freq_response, sep=','), np.fromstring(power_response, sep=',')
 
     @method_timer
     def get_results(self):
@@ -171,36 +346,30 @@ class SpurSearch:
             list: List of tuples (frequency_hz, power_dbm) for detected spurs, excluding fundamental.
         """
         try:
-            # Query the number of spurs detected
-            spur_count = int(self.VSA.query(":CALC:MARK:FUNC:FPE:COUN?").strip())
+            spur_count, freqs, powers = self._read_peak_lists()
             spurs = []
 
             if spur_count > 0:
-                self.VSA.write('DISP:WIND1:SUBW:TRAC1:Y:SCAL:AUTO ONCE')  # Auto scale Y-axis
-                # Query all spur frequencies and amplitudes at once
-                freq_response = self.VSA.query(":CALC:MARK:FUNC:FPE:X?").strip()
-                power_response = self.VSA.query(":CALC:MARK:FUNC:FPE:Y?").strip()
-
-                # Split the comma-separated responses into lists
-                freqs = [float(f) for f in freq_response.split(",") if f.strip()]
-                powers = [float(p) for p in power_response.split(",") if p.strip()]
+                if not self.headless:
+                    self.VSA.write(':DISP:WIND1:SUBW:TRAC1:Y:SCAL:AUTO ONCE')  # Auto scale Y-axis for the operator
 
                 # Ensure the number of frequencies and powers match
-                if len(freqs) != spur_count or len(powers) != spur_count:
+                if freqs.size != spur_count or powers.size != spur_count:
                     logger.warning(
-                        f"Mismatch in spur data: expected {spur_count} spurs, got {len(freqs)} frequencies and {len(powers)} powers")
+                        f"Mismatch in spur data: expected {spur_count} spurs, got {freqs.size} frequencies and {powers.size} powers")
                     return spurs
 
-                # Filter spurs to exclude fundamental frequency (±10 MHz)
-                fundamental_hz = self.fundamental_ghz * 1e9
-                exclusion_window_hz = 10e6  # ±10 MHz around fundamental
-                for i, (freq_hz, power_dbm) in enumerate(zip(freqs, powers), 1):
-                    if abs(freq_hz - fundamental_hz) > exclusion_window_hz:
-                        spurs.append((freq_hz, power_dbm))
-                        logger.info(f"Spur {i}: {freq_hz / 1e9:.6f} GHz, {power_dbm:.2f} dBm")
-                    else:
-                        logger.debug(
-                            f"Excluding spur at {freq_hz / 1e9:.6f} GHz (near fundamental {fundamental_hz / 1e9:.3f} GHz)")
+                # Filter spurs to exclude the fundamental frequency window
+                fundamental_hz = self._fundamental_hz
+                mask = np.abs(freqs - fundamental_hz) > self._exclusion_window_hz
+                spurs = list(zip(freqs[mask].tolist(), powers[mask].tolist()))
+                if logger.isEnabledFor(logging.INFO):
+                    for i in np.flatnonzero(mask).tolist():
+                        logger.info("Spur %d: %.6f GHz, %.2f dBm", i + 1, freqs[i] / 1e9, powers[i])
+                if logger.isEnabledFor(logging.DEBUG):
+                    for freq_hz in freqs[~mask].tolist():
+                        logger.debug("Excluding spur at %.6f GHz (near fundamental %.3f GHz)",
+                                     freq_hz / 1e9, fundamental_hz / 1e9)
 
             if not spurs:
                 logger.info("No spurs detected after filtering")
@@ -210,14 +379,17 @@ class SpurSearch:
             return []
 
     def close(self):
-        """Close VSA and VSG connections."""
+        """Turn off the VSG output and release the VSA/VSG connections.
+
+        The sockets stay open in the shared bench pool for the next SpurSearch;
+        bench().close_all() closes them at the end of the run.
+        """
+        self._pool.shutdown(wait=False)
         try:
-            if self.VSA:
-                self.VSA.close()
-                logger.info("FSW connection closed")
             if self.VSG:
-                self.VSG.write("OUTP:STAT OFF")  # Turn off VSG output
-                self.VSG.close()
-                logger.info("VSG connection closed")
+                self.VSG.write(":OUTP:STAT OFF")  # Turn off VSG output
+            self.VSA = None
+            self.VSG = None
+            logger.info("SpurSearch released FSW/VSG connections")
         except Exception as e:
-            logger.error(f"Error closing connections: {e}")
\ No newline at end of file
+            logger.error(f"Error releasing connections: {e}")
\ No newline at end of file
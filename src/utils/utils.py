@@ -4,13 +4,19 @@ Provides timing decorators and standard configuration/measurement functions.
 """
 
 # File: src/utils/utils.py
-import timeit
+import time
+from collections import namedtuple
 from functools import wraps
 import logging
 
+# Waveform parameters a cellular driver reports for one measurement record
+WaveformSnapshot = namedtuple('WaveformSnapshot', 'bw scs rb rbo mod dupl ldir')
+
+logger = logging.getLogger(__name__)
+
 
 def method_timer(method):
-    """Decorator to measure and print execution time of a method.
+    """Decorator to measure execution time of a method and log it at DEBUG.
 
     Args:
         method (callable): Method to time.
@@ -18,12 +24,13 @@ def method_timer(method):
     Returns:
         callable: Wrapped method that returns result and execution time.
     """
+    @wraps(method)
     def wrapper(*args, **kwargs):
-        start_time = timeit.default_timer()
+        start_ns = time.perf_counter_ns()
         result = method(*args, **kwargs)
-        stop_time = timeit.default_timer()
-        delta_time = stop_time - start_time
-        print(f"{method.__name__:15s}: {delta_time:.3f} secs")
+        delta_time = (time.perf_counter_ns() - start_ns) * 1e-9
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%-15s: %.3f secs", method.__name__, delta_time)
         return result, delta_time
     return wrapper
 
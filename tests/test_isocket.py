@@ -0,0 +1,118 @@
+# tests/test_isocket.py
+import socket
+import unittest
+from src.instruments.iSocket import iSocket
+from src.instruments.bench import bench
+
+
+class TestISocketFraming(unittest.TestCase):
+    """Response framing of iSocket over a local socketpair (no instrument needed)."""
+
+    def setUp(self):
+        self.inst = iSocket()
+        self.inst.sock, self.peer = socket.socketpair()
+        self.inst.sock.settimeout(2)
+
+    def tearDown(self):
+        self.inst.close()
+        self.peer.close()
+
+    def test_query_sends_newline_terminated_command(self):
+        self.peer.sendall(b'1\n')
+        self.assertEqual(self.inst.query('*OPC?'), '1')
+        self.assertEqual(self.peer.recv(64), b'*OPC?\n')
+
+    def test_response_split_across_reads(self):
+        self.inst._chunk = memoryview(bytearray(4))  # Force several recv_into calls per line
+        self.peer.sendall(b'Rohde&Schwarz,FSW-26\n')
+        self.assertEqual(self.inst.query('*IDN?'), 'Rohde&Schwarz,FSW-26')
+
+    def test_chained_responses_are_buffered(self):
+        self.peer.sendall(b'3;1e9,2e9,3e9;-90,-95,-99\nNEXT\n')
+        self.assertEqual(self.inst.query(':CALC:MARK:FUNC:FPE:COUN?;:CALC:MARK:FUNC:FPE:X?'),
+                         '3;1e9,2e9,3e9;-90,-95,-99')
+        self.assertEqual(self.inst.query('*OPC?'), 'NEXT')  # Served from the buffer
+
+    def test_query_binary_definite_block(self):
+        payload = b'ab\ncd'  # Payload may contain the terminator
+        self.peer.sendall(b'#15' + payload + b'\nAFTER\n')
+        self.assertEqual(self.inst.queryBinary(':TRAC:DATA?'), payload)
+        self.assertEqual(self.inst.query('*OPC?'), 'AFTER')
+
+    def test_query_binary_multi_digit_length_split(self):
+        self.inst._chunk = memoryview(bytearray(3))
+        payload = bytes(range(256)) * 2
+        self.peer.sendall(b'#3512' + payload + b'\n')
+        self.assertEqual(self.inst.queryBinary(':TRAC:DATA?'), payload)
+
+    def test_query_binary_indefinite_block(self):
+        self.peer.sendall(b'#0raw-bytes\n')
+        self.assertEqual(self.inst.queryBinary(':TRAC:DATA?'), b'raw-bytes')
+
+    def test_query_binary_rejects_ascii_response(self):
+        self.peer.sendall(b'1.5\n')
+        with self.assertRaises(ValueError):
+            self.inst.queryBinary(':TRAC:DATA?')
+
+    def test_write_many_and_sync_many_chain_commands(self):
+        self.inst.write_many((':A 1', ':B 2'))
+        self.peer.sendall(b'1\n')
+        self.assertEqual(self.inst.write_sync_many((':C 3',)), '1')
+        self.assertEqual(self.peer.recv(64), b':A 1;:B 2\n:C 3;*OPC?\n')
+
+    def test_peer_close_raises_connection_error(self):
+        self.peer.close()
+        with self.assertRaises(ConnectionError):
+            self.inst._readline()
+
+    def test_set_timeout_returns_previous(self):
+        self.assertEqual(self.inst.set_timeout(5), 2)
+        self.assertEqual(self.inst.sock.gettimeout(), 5)
+
+    def test_close_clears_socket_and_buffer(self):
+        self.inst._rbuf += b'stale\n'
+        self.inst.close()
+        self.assertIsNone(self.inst.sock)
+        self.assertEqual(self.inst._rbuf, b'')
+
+    def test_failed_query_closes_connection(self):
+        self.inst.set_timeout(0.05)
+        with self.assertRaises(socket.timeout):
+            self.inst.query('*OPC?')
+        self.assertIsNone(self.inst.sock)
+
+
+class TestBenchConnectionReuse(unittest.TestCase):
+    """bench._is_alive only accepts open connections with no unread reply."""
+
+    def setUp(self):
+        self.inst = iSocket()
+        self.inst.sock, self.peer = socket.socketpair()
+        self.inst.sock.settimeout(2)
+
+    def tearDown(self):
+        self.inst.close()
+        self.peer.close()
+
+    def test_idle_connection_is_reusable(self):
+        self.assertTrue(bench._is_alive(self.inst))
+        self.assertEqual(self.inst.sock.gettimeout(), 2)
+
+    def test_pending_peer_bytes_are_dirty(self):
+        self.peer.sendall(b'1\n')
+        self.assertFalse(bench._is_alive(self.inst))
+
+    def test_buffered_reply_is_dirty(self):
+        self.peer.sendall(b'1\n2\n')
+        self.inst.query('*OPC?')
+        self.assertFalse(bench._is_alive(self.inst))
+
+    def test_peer_closed_or_local_closed(self):
+        self.peer.close()
+        self.assertFalse(bench._is_alive(self.inst))
+        self.inst.close()
+        self.assertFalse(bench._is_alive(self.inst))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# tests/test_main_helpers.py
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+HAVE_DEPS = all(importlib.util.find_spec(m) is not None for m in ('numpy', 'pandas'))
+
+if HAVE_DEPS:
+    import numpy as np
+    from src.main import (MeasurementResult, ResultWriter, _expand_freqs, _median, _stats,
+                          frequency_range_ghz)
+
+
+@unittest.skipUnless(HAVE_DEPS, "numpy and pandas are required")
+class TestFrequencyGrid(unittest.TestCase):
+    def test_whole_number_of_steps_includes_stop(self):
+        np.testing.assert_allclose(frequency_range_ghz(2.4, 2.48, 20), [2.4, 2.42, 2.44, 2.46, 2.48])
+
+    def test_partial_step_ends_below_stop(self):
+        np.testing.assert_allclose(frequency_range_ghz(1.0, 1.003, 2), [1.0, 1.002])
+        self.assertEqual(frequency_range_ghz(2.4, 2.481, 20).size, 5)
+
+    def test_single_point(self):
+        np.testing.assert_allclose(frequency_range_ghz(6.0, 6.0, 5), [6.0])
+
+    def test_expand_range_rejects_sub_khz_step(self):
+        with self.assertRaises(ValueError):
+            _expand_freqs({"range": {"start_ghz": 1.0, "stop_ghz": 1.1, "step_mhz": 0.0004}})
+
+    def test_expand_range_rejects_bad_ranges(self):
+        for range_config in ({"start_ghz": 2.0, "stop_ghz": 1.0, "step_mhz": 1},
+                             {"start_ghz": 1.0, "stop_ghz": 2.0, "step_mhz": 0},
+                             {"start_ghz": 1.0, "stop_ghz": 2.0}):
+            with self.subTest(range_config=range_config), self.assertRaises(ValueError):
+                _expand_freqs({"range": range_config})
+
+    def test_expand_scalar_and_list(self):
+        np.testing.assert_allclose(_expand_freqs(2.44), [2.44])
+        np.testing.assert_allclose(_expand_freqs([2.43, 2.44]), [2.43, 2.44])
+        with self.assertRaises(ValueError):
+            _expand_freqs(True)
+
+
+@unittest.skipUnless(HAVE_DEPS, "numpy and pandas are required")
+class TestStatistics(unittest.TestCase):
+    def test_median_odd_and_even(self):
+        self.assertEqual(_median(np.array([5.0, 1.0, 3.0])), 3.0)
+        self.assertEqual(_median(np.array([4.0, 1.0, 3.0, 10.0])), 3.5)
+
+    def test_stats(self):
+        self.assertEqual(_stats([1, 2, 3, 10]), (16.0, 4.0, 2.5))
+
+    def test_stats_empty(self):
+        self.assertEqual(_stats([]), (0.0, 0.0, 0.0))
+
+
+@unittest.skipUnless(HAVE_DEPS, "numpy and pandas are required")
+class TestResultWriter(unittest.TestCase):
+    def _round_trip(self, writer, tmpdir):
+        writer.write(MeasurementResult(test_set=2, type="STN", markers=[-170.1, -170.3]))
+        writer.write(MeasurementResult(test_set=1, type="SpurSearch", spurs=[], timings={"measure": 0.5}))
+        writer.close()
+        records = writer.read()
+        self.assertEqual([r.test_set for r in records], [1, 2])  # Sorted by test set
+        self.assertEqual(records[0].timings, {"measure": 0.5})
+        self.assertEqual(records[1].markers, [-170.1, -170.3])
+        json_path = os.path.join(tmpdir, 'results.json')
+        writer.export_json(json_path)
+        with open(json_path) as f:
+            self.assertEqual([r["type"] for r in json.load(f)], ["STN", "SpurSearch"])
+
+    def test_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._round_trip(ResultWriter(os.path.join(tmpdir, 'results.ndjson')), tmpdir)
+
+    def test_in_memory_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._round_trip(ResultWriter(), tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
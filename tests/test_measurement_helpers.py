@@ -0,0 +1,146 @@
+# tests/test_measurement_helpers.py
+import importlib.util
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.measurements.lte import std_insr_driver as LTEDriver
+from src.measurements.nr5g_fr1 import std_insr_driver as NR5GDriver
+
+HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+
+if HAVE_NUMPY:
+    from src.measurements.SubThermalNoise import option_functions
+    from src.measurements.spur_search import MAX_SWEEP_POINTS, MIN_SWEEP_POINTS, SpurSearch, _sweep_points
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is required")
+class TestSweepPoints(unittest.TestCase):
+    def test_two_points_per_rbw(self):
+        self.assertEqual(_sweep_points(5e8, 1e5), 10000)
+
+    def test_clamped_to_limits(self):
+        self.assertEqual(_sweep_points(1.219e9, 2e4), MAX_SWEEP_POINTS)
+        self.assertEqual(_sweep_points(2e8, 1e6), MIN_SWEEP_POINTS)
+
+
+def _bare_driver(driver_cls, **attrs):
+    """Return a driver without running __init__, which connects to the bench."""
+    driver = driver_cls.__new__(driver_cls)
+    driver._info_suffix_key = driver._info_suffix_cache = None
+    driver.waveform_file = driver.setup_file = None
+    for name, value in attrs.items():
+        setattr(driver, name, value)
+    return driver
+
+
+class TestInfoSuffix(unittest.TestCase):
+    def test_nr5g_suffix_follows_attribute_changes(self):
+        driver = _bare_driver(NR5GDriver, bw=100, dupl="TDD", ldir="DL", scs=30, rb=273, rbo=0, mod="256QAM")
+        self.assertEqual(driver._info_suffix, "100MHz_TDD_DL_30_273RB_0RBO_256QAM")
+        driver.bw, driver.rb = 20, 51
+        driver.waveform_file = "waveforms/5GNR_DL_20MHz_256QAM_30kHz_51RB_0RBO.wv"
+        self.assertEqual(driver._info_suffix,
+                         "20MHz_TDD_DL_30_51RB_0RBO_256QAM_waveform_5GNR_DL_20MHz_256QAM_30kHz_51RB_0RBO.wv")
+
+    def test_lte_suffix_follows_attribute_changes(self):
+        driver = _bare_driver(LTEDriver, bw=20, dupl="FDD", ldir="UL", rb=100, rbo=0, mod="QPSK", waveform_params={})
+        self.assertEqual(driver._info_suffix, "20MHz_FDD_UL_15kHz_100RB_0RBO_QPSK")
+        driver.mod = "64QAM"
+        driver.setup_file = "setups/LTE_UL_20MHz_64QAM_100RB_0RBO.dfl"
+        self.assertEqual(driver._info_suffix, "20MHz_FDD_UL_15kHz_100RB_0RBO_64QAM_setup_LTE_UL_20MHz_64QAM_100RB_0RBO.dfl")
+
+
+class _RecordingInstrument:
+    """Stands in for an iSocket and records the commands sent to it."""
+
+    def __init__(self):
+        self.sent = []
+
+    def write(self, cmd):
+        self.sent.append(cmd)
+
+    def query(self, cmd):
+        self.sent.append(cmd)
+        return '1'
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is required")
+class TestVSAConfigOrder(unittest.TestCase):
+    def setUp(self):
+        self.spur = SpurSearch.__new__(SpurSearch)  # Skip __init__, which connects to the bench
+        self.spur.fundamental_ghz, self.spur.rbw_mhz, self.spur.spur_limit_dbm = 3.0, 0.01, -95
+        self.spur.batch_commands = False
+        self.spur.VSA = _RecordingInstrument()
+
+    def test_span_then_settings_then_limits_then_enables(self):
+        self.spur.VSA_config()
+        sent = self.spur.VSA.sent
+        order = [next(i for i, cmd in enumerate(sent) if cmd.startswith(prefix)) for prefix in (
+            '*RST', ':INIT:CONT OFF', ':SENS:FREQ:STAR', ':SENS:FREQ:STOP', ':SENS:SWE:TYPE FFT',
+            ':CALC1:MARK1:X:SLIM:LEFT', ':CALC1:MARK1:X:SLIM:RIGH', ':CALC1:THR ',
+            ':CALC1:MARK1:X:SLIM:STAT ON', ':CALC1:THR:STAT ON', '*OPC?')]
+        self.assertEqual(order, sorted(order))
+
+    def test_warm_point_skips_reset(self):
+        self.spur.VSA_config(reset=False)
+        self.assertNotIn('*RST', self.spur.VSA.sent)
+
+
+class _FailingInstrument(_RecordingInstrument):
+    def query(self, cmd):
+        raise TimeoutError("no reply")
+
+
+class _RecordingBench:
+    VSA_IP, VSG_IP = '10.0.0.1', '10.0.0.2'
+
+    def __init__(self):
+        self.evicted = []
+
+    def _evict(self, ip):
+        self.evicted.append(ip)
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is required")
+class TestConfigureAll(unittest.TestCase):
+    def setUp(self):
+        self.spur = SpurSearch.__new__(SpurSearch)
+        self.spur.fundamental_ghz, self.spur.rbw_mhz, self.spur.spur_limit_dbm = 3.0, 0.01, -95
+        self.spur.frequency, self.spur.pwr = 3e9, -70
+        self.spur.batch_commands = False
+        self.spur._pool = ThreadPoolExecutor(max_workers=2)
+        self.spur._bench = _RecordingBench()
+        self.vsg = _RecordingInstrument()
+        self.spur.VSA, self.spur.VSG = _FailingInstrument(), self.vsg
+
+    def tearDown(self):
+        self.spur._pool.shutdown()
+
+    def test_failure_waits_for_both_and_evicts_both(self):
+        with self.assertRaises(TimeoutError):
+            self.spur.configure_all()
+        self.assertEqual(self.vsg.sent[-1], '*OPC?')  # VSG setup ran to completion
+        self.assertEqual(sorted(self.spur._bench.evicted), ['10.0.0.1', '10.0.0.2'])
+        self.assertIsNone(self.spur.VSA)
+        self.assertIsNone(self.spur.VSG)
+
+    def test_success_returns_both_timings(self):
+        self.spur.VSA = _RecordingInstrument()
+        self.assertEqual(set(self.spur.configure_all()), {"VSG_Config", "VSA_Config"})
+        self.assertEqual(self.spur._bench.evicted, [])
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is required")
+class TestArrayStats(unittest.TestCase):
+    def test_population_stats(self):
+        self.assertEqual(option_functions.get_Array_stats([1.0, 2.0, 3.0, 4.0]),
+                         'Min:1.000 Max:4.000 Avg:2.500 StdDev:1.118 Delta:3.000')
+
+    def test_constant_array_has_zero_std(self):
+        self.assertIn('StdDev:0.000', option_functions.get_Array_stats([-170.25] * 5))
+
+    def test_large_offset_keeps_std_precision(self):
+        self.assertIn('StdDev:0.816', option_functions.get_Array_stats([1e8, 1e8 + 1, 1e8 + 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()